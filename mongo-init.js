@@ -7,6 +7,10 @@ db.createCollection('knownSpeakers');
 db.createCollection('speakerSegments');
 db.createCollection('processingJobs');
 db.createCollection('speakerTags');
+db.createCollection('recordingTranscripts');
+db.createCollection('transcriptPostings');
+db.createCollection('resourceProfiles');
+db.createCollection('workerProcesses');
 
 // Create indexes
 db.recordings.createIndex({ status: 1 });
@@ -23,11 +27,26 @@ db.speakerSegments.createIndex({ startTime: 1, endTime: 1 });
 db.processingJobs.createIndex({ recordingId: 1 });
 db.processingJobs.createIndex({ status: 1 });
 db.processingJobs.createIndex({ createdAt: -1 });
+db.processingJobs.createIndex({ status: 1, workerNode: 1 });
+db.processingJobs.createIndex({ status: 1, jobType: 1, stage: 1, createdAt: 1 });
+db.processingJobs.createIndex({ parentJobId: 1 });
+
+db.resourceProfiles.createIndex({ whisperModel: 1, executionMode: 1, createdAt: -1 });
+
+db.workerProcesses.createIndex({ nodeId: 1, heartbeatAt: -1 });
+// Processes that died without unregistering
+db.workerProcesses.createIndex({ heartbeatAt: 1 }, { expireAfterSeconds: 86400 });
 
 db.speakerTags.createIndex(
   { recordingId: 1, speakerLabel: 1 }, 
   { unique: true }
 );
 
+db.recordingTranscripts.createIndex({ recordingId: 1 }, { unique: true });
+
+db.transcriptPostings.createIndex({ token: 1, recordingStart: -1 });
+db.transcriptPostings.createIndex({ token: 1, speakerLabel: 1 });
+db.transcriptPostings.createIndex({ recordingId: 1 });
+
 print('Database initialized successfully');
 
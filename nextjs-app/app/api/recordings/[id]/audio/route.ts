@@ -2,9 +2,9 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { connectToDatabase } from '@/lib/mongodb';
 import { ObjectId } from 'mongodb';
-import { readFile } from 'fs/promises';
 import { existsSync } from 'fs';
 import { extname } from 'path';
+import { createFileResponse } from '@/lib/storage';
 
 export async function GET(
   request: NextRequest,
@@ -30,8 +30,6 @@ export async function GET(
       );
     }
 
-    const audioBuffer = await readFile(recording.filePath);
-    
     // Determine content type based on file extension
     const ext = extname(recording.filePath || recording.filename || '').toLowerCase();
     const contentTypeMap: Record<string, string> = {
@@ -43,13 +41,8 @@ export async function GET(
     };
     const contentType = contentTypeMap[ext] || 'audio/mpeg';
     
-    return new NextResponse(audioBuffer, {
-      headers: {
-        'Content-Type': contentType,
-        'Content-Length': audioBuffer.length.toString(),
-        'Accept-Ranges': 'bytes',
-      }
-    });
+    // Stream only the requested byte range so seeking does not load the whole file
+    return await createFileResponse(recording.filePath, contentType, request.headers.get('range'));
   } catch (error: any) {
     return NextResponse.json(
       { error: error.message },
@@ -2,7 +2,10 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { connectToDatabase } from '@/lib/mongodb';
 import { ObjectId } from 'mongodb';
-import { deleteFile } from '@/lib/storage';
+import { deleteDirectory, deleteFile, getStoragePath } from '@/lib/storage';
+import { deleteCompactTranscript, loadTranscriptSegments } from '@/lib/transcripts';
+import { deleteSearchPostings } from '@/lib/search';
+import { join } from 'path';
 
 export async function GET(
   request: NextRequest,
@@ -22,14 +25,11 @@ export async function GET(
     }
 
     // Get segments
-    const segments = await db.collection('speakerSegments')
-      .find({ recordingId: new ObjectId(params.id) })
-      .sort({ startTime: 1 })
-      .toArray();
+    const segments = await loadTranscriptSegments(db, new ObjectId(params.id));
 
-    // Get jobs
+    // Get jobs (stage tasks of staged jobs are reported through their parent job)
     const jobs = await db.collection('processingJobs')
-      .find({ recordingId: new ObjectId(params.id) })
+      .find({ recordingId: new ObjectId(params.id), jobType: { $ne: 'stage' } })
       .sort({ createdAt: -1 })
       .toArray();
 
@@ -69,6 +69,9 @@ export async function DELETE(
       // Delete audio file
       await deleteFile(recording.filePath);
 
+      // Delete waveform summary files
+      await deleteDirectory(join(getStoragePath(), 'waveforms', recordingId.toString()));
+
       // Delete segment files
       const segments = await db.collection('speakerSegments')
         .find({ recordingId })
@@ -86,6 +89,8 @@ export async function DELETE(
     await db.collection('speakerSegments').deleteMany({ recordingId });
     await db.collection('processingJobs').deleteMany({ recordingId });
     await db.collection('speakerTags').deleteMany({ recordingId });
+    await deleteCompactTranscript(db, recordingId);
+    await deleteSearchPostings(db, recordingId);
 
     return NextResponse.json({ success: true });
   } catch (error: any) {
@@ -2,6 +2,7 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { connectToDatabase } from '@/lib/mongodb';
 import { ObjectId } from 'mongodb';
+import { loadCompactTranscript } from '@/lib/transcripts';
 
 export async function GET(
   request: NextRequest,
@@ -13,6 +14,17 @@ export async function GET(
     const identifiedSpeakerId = searchParams.get('identifiedSpeakerId');
 
     const { db } = await connectToDatabase();
+
+    // Compact transcripts hold the whole recording in one document
+    const compact = await loadCompactTranscript(db, new ObjectId(params.id));
+    if (compact) {
+      const filtered = compact.filter(seg =>
+        (!speakerLabel || seg.speakerLabel === speakerLabel) &&
+        (!identifiedSpeakerId || seg.identifiedSpeakerId?.toString() === identifiedSpeakerId)
+      );
+      return NextResponse.json(filtered);
+    }
+
     const query: any = { recordingId: new ObjectId(params.id) };
 
     if (speakerLabel) {
@@ -2,6 +2,7 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { connectToDatabase } from '@/lib/mongodb';
 import { ObjectId } from 'mongodb';
+import { loadTranscriptSegments } from '@/lib/transcripts';
 
 export async function GET(
   request: NextRequest,
@@ -12,10 +13,7 @@ export async function GET(
     const format = searchParams.get('format') || 'json';
 
     const { db } = await connectToDatabase();
-    const segments = await db.collection('speakerSegments')
-      .find({ recordingId: new ObjectId(params.id) })
-      .sort({ startTime: 1 })
-      .toArray();
+    const segments = await loadTranscriptSegments(db, new ObjectId(params.id));
 
     if (format === 'txt') {
       const text = segments
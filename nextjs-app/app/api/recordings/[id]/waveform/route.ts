@@ -0,0 +1,133 @@
+// app/api/recordings/[id]/waveform/route.ts
+import { NextRequest, NextResponse } from 'next/server';
+import { connectToDatabase } from '@/lib/mongodb';
+import { ObjectId } from 'mongodb';
+import { existsSync } from 'fs';
+import { createFileResponse, streamFileRange } from '@/lib/storage';
+
+// Each peak bin is stored as int8 (min, max, rms)
+const BYTES_PER_BIN = 3;
+
+export async function GET(
+  request: NextRequest,
+  { params }: { params: { id: string } }
+) {
+  try {
+    const { searchParams } = new URL(request.url);
+    const type = searchParams.get('type') || 'meta';
+
+    const { db } = await connectToDatabase();
+    const recording = await db.collection('recordings').findOne(
+      { _id: new ObjectId(params.id) },
+      { projection: { waveform: 1 } }
+    );
+
+    if (!recording) {
+      return NextResponse.json(
+        { error: 'Recording not found' },
+        { status: 404 }
+      );
+    }
+
+    const waveform = recording.waveform;
+    if (!waveform) {
+      return NextResponse.json(
+        { error: 'Waveform summary not available' },
+        { status: 404 }
+      );
+    }
+
+    if (type === 'meta') {
+      // Do not expose storage paths
+      return NextResponse.json({
+        version: waveform.version,
+        sampleRate: waveform.sampleRate,
+        numSamples: waveform.numSamples,
+        durationSeconds: waveform.durationSeconds,
+        levels: waveform.levels.map((level: any) => ({
+          samplesPerBin: level.samplesPerBin,
+          binsPerSecond: level.binsPerSecond,
+          binCount: level.binCount
+        })),
+        activity: {
+          frameSeconds: waveform.activity.frameSeconds,
+          frameCount: waveform.activity.frameCount,
+          bytesPerSpeaker: waveform.activity.bytesPerSpeaker,
+          speakers: waveform.activity.speakers
+        }
+      });
+    }
+
+    if (type === 'activity') {
+      if (!existsSync(waveform.activity.path)) {
+        return NextResponse.json(
+          { error: 'Activity file not found' },
+          { status: 404 }
+        );
+      }
+      return await createFileResponse(
+        waveform.activity.path,
+        'application/octet-stream',
+        request.headers.get('range')
+      );
+    }
+
+    if (type === 'peaks') {
+      // Default to the coarsest level
+      const samplesPerBin = parseInt(searchParams.get('samplesPerBin') || '0');
+      const level = waveform.levels.find((l: any) => l.samplesPerBin === samplesPerBin)
+        || waveform.levels[waveform.levels.length - 1];
+      if (!level || !existsSync(level.path)) {
+        return NextResponse.json(
+          { error: 'Peaks file not found' },
+          { status: 404 }
+        );
+      }
+
+      const start = searchParams.get('start');
+      const end = searchParams.get('end');
+      if (start === null && end === null) {
+        return await createFileResponse(
+          level.path,
+          'application/octet-stream',
+          request.headers.get('range')
+        );
+      }
+
+      // Slice by time: start/end in seconds from the recording start
+      const firstBin = Math.max(0, Math.floor(parseFloat(start || '0') * level.binsPerSecond));
+      const lastBin = Math.min(
+        level.binCount - 1,
+        end === null ? level.binCount - 1 : Math.ceil(parseFloat(end) * level.binsPerSecond) - 1
+      );
+      if (Number.isNaN(firstBin) || Number.isNaN(lastBin) || firstBin > lastBin) {
+        return NextResponse.json(
+          { error: 'Invalid start/end' },
+          { status: 400 }
+        );
+      }
+
+      return new NextResponse(
+        streamFileRange(level.path, firstBin * BYTES_PER_BIN, (lastBin + 1) * BYTES_PER_BIN - 1),
+        {
+          headers: {
+            'Content-Type': 'application/octet-stream',
+            'Content-Length': ((lastBin - firstBin + 1) * BYTES_PER_BIN).toString(),
+            'X-Samples-Per-Bin': level.samplesPerBin.toString(),
+            'X-First-Bin': firstBin.toString()
+          }
+        }
+      );
+    }
+
+    return NextResponse.json(
+      { error: `Unknown waveform type: ${type}` },
+      { status: 400 }
+    );
+  } catch (error: any) {
+    return NextResponse.json(
+      { error: error.message },
+      { status: 500 }
+    );
+  }
+}
@@ -0,0 +1,56 @@
+// app/api/search/route.ts
+import { NextRequest, NextResponse } from 'next/server';
+import { connectToDatabase } from '@/lib/mongodb';
+import { searchTranscripts } from '@/lib/search';
+
+const DATE_ONLY_PATTERN = /^\d{4}-\d{2}-\d{2}$/;
+
+export async function GET(request: NextRequest) {
+  try {
+    const { searchParams } = new URL(request.url);
+    const q = searchParams.get('q');
+    const from = searchParams.get('from');
+    const to = searchParams.get('to');
+    const limit = parseInt(searchParams.get('limit') || '50');
+
+    if (!q || q.trim() === '') {
+      return NextResponse.json(
+        { error: 'Query parameter q is required' },
+        { status: 400 }
+      );
+    }
+
+    const fromDate = from ? new Date(from) : null;
+    const toDate = to ? new Date(to) : null;
+    if (toDate && DATE_ONLY_PATTERN.test(to!)) {
+      // A date-only bound includes that whole day: stop just before the next
+      // midnight (BSON dates have millisecond precision)
+      toDate.setUTCDate(toDate.getUTCDate() + 1);
+      toDate.setUTCMilliseconds(toDate.getUTCMilliseconds() - 1);
+    }
+    if ((fromDate && Number.isNaN(fromDate.getTime())) || (toDate && Number.isNaN(toDate.getTime()))) {
+      return NextResponse.json(
+        { error: 'Invalid from/to date' },
+        { status: 400 }
+      );
+    }
+
+    const { db } = await connectToDatabase();
+    const results = await searchTranscripts(db, {
+      query: q,
+      speaker: searchParams.get('speaker'),
+      meetingId: searchParams.get('meetingId'),
+      recordingId: searchParams.get('recordingId'),
+      from: fromDate,
+      to: toDate,
+      limit
+    });
+
+    return NextResponse.json({ query: q, results });
+  } catch (error: any) {
+    return NextResponse.json(
+      { error: error.message },
+      { status: 500 }
+    );
+  }
+}
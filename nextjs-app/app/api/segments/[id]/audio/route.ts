@@ -2,8 +2,8 @@
 import { NextRequest, NextResponse } from 'next/server';
 import { connectToDatabase } from '@/lib/mongodb';
 import { ObjectId } from 'mongodb';
-import { readFile } from 'fs/promises';
 import { existsSync } from 'fs';
+import { createFileResponse } from '@/lib/storage';
 
 export async function GET(
   request: NextRequest,
@@ -29,14 +29,7 @@ export async function GET(
       );
     }
 
-    const audioBuffer = await readFile(segment.segmentAudioPath);
-    
-    return new NextResponse(audioBuffer, {
-      headers: {
-        'Content-Type': 'audio/wav',
-        'Content-Length': audioBuffer.length.toString()
-      }
-    });
+    return await createFileResponse(segment.segmentAudioPath, 'audio/wav', request.headers.get('range'));
   } catch (error: any) {
     return NextResponse.json(
       { error: error.message },
@@ -25,6 +25,7 @@ interface Recording {
   meetingScheduledAt?: string
   segments: SpeakerSegment[]
   speakerTags?: SpeakerTag[]
+  waveform?: object | null
 }
 
 interface SpeakerSegment {
@@ -194,6 +195,9 @@ export default function RecordingDetailPage() {
             >
               Your browser does not support the audio element.
             </audio>
+            {recording.waveform && (
+              <WaveformTimeline recordingId={params.id as string} getSpeakerName={getSpeakerName} />
+            )}
           </div>
         )}
       </div>
@@ -322,3 +326,135 @@ export default function RecordingDetailPage() {
   )
 }
 
+interface WaveformMeta {
+  durationSeconds: number
+  levels: { samplesPerBin: number; binsPerSecond: number; binCount: number }[]
+  activity: { frameSeconds: number; frameCount: number; bytesPerSpeaker: number; speakers: string[] }
+}
+
+const TIMELINE_WIDTH = 1000
+const WAVEFORM_HEIGHT = 60
+const LANE_HEIGHT = 14
+
+// Draws the timeline from the worker's precomputed peaks and speaker activity bitmaps
+function WaveformTimeline({
+  recordingId,
+  getSpeakerName
+}: {
+  recordingId: string
+  getSpeakerName: (speakerLabel: string) => string
+}) {
+  const [meta, setMeta] = useState<WaveformMeta | null>(null)
+  const [peaks, setPeaks] = useState<Int8Array | null>(null)
+  const [activity, setActivity] = useState<Uint8Array | null>(null)
+
+  useEffect(() => {
+    let cancelled = false
+    const load = async () => {
+      try {
+        const metaRes = await fetch(`/api/recordings/${recordingId}/waveform`)
+        if (!metaRes.ok) return
+        const metaData: WaveformMeta = await metaRes.json()
+        // The coarsest level is enough for an overview (1 bin per second)
+        const [peaksRes, activityRes] = await Promise.all([
+          fetch(`/api/recordings/${recordingId}/waveform?type=peaks`),
+          fetch(`/api/recordings/${recordingId}/waveform?type=activity`)
+        ])
+        if (!peaksRes.ok || !activityRes.ok) return
+        const peaksData = new Int8Array(await peaksRes.arrayBuffer())
+        const activityData = new Uint8Array(await activityRes.arrayBuffer())
+        if (!cancelled) {
+          setMeta(metaData)
+          setPeaks(peaksData)
+          setActivity(activityData)
+        }
+      } catch (error) {
+        console.error('Error loading waveform:', error)
+      }
+    }
+    load()
+    return () => { cancelled = true }
+  }, [recordingId])
+
+  if (!meta || !peaks || !activity) {
+    return null
+  }
+
+  // Merge bins into at most TIMELINE_WIDTH columns
+  const binCount = peaks.length / 3
+  const columns = Math.min(TIMELINE_WIDTH, binCount)
+  const columnWidth = TIMELINE_WIDTH / Math.max(columns, 1)
+  let waveformPath = ''
+  for (let col = 0; col < columns; col++) {
+    const first = Math.floor(col * binCount / columns)
+    const last = Math.max(first + 1, Math.floor((col + 1) * binCount / columns))
+    let min = 0
+    let max = 0
+    for (let bin = first; bin < last; bin++) {
+      min = Math.min(min, peaks[bin * 3])
+      max = Math.max(max, peaks[bin * 3 + 1])
+    }
+    const x = (col + 0.5) * columnWidth
+    const mid = WAVEFORM_HEIGHT / 2
+    waveformPath += `M${x},${mid - (max / 127) * mid}V${mid - (min / 127) * mid}`
+  }
+
+  const { frameCount, bytesPerSpeaker, speakers } = meta.activity
+  const lanes = speakers.map((speaker, speakerIdx) => {
+    const runs: { start: number; end: number }[] = []
+    let runStart = -1
+    for (let frame = 0; frame <= frameCount; frame++) {
+      const byte = activity[speakerIdx * bytesPerSpeaker + (frame >> 3)]
+      const active = frame < frameCount && ((byte >> (7 - (frame & 7))) & 1) === 1
+      if (active && runStart < 0) {
+        runStart = frame
+      } else if (!active && runStart >= 0) {
+        runs.push({ start: runStart, end: frame })
+        runStart = -1
+      }
+    }
+    return { speaker, runs }
+  })
+
+  const frameScale = TIMELINE_WIDTH / Math.max(frameCount, 1)
+  const height = WAVEFORM_HEIGHT + lanes.length * LANE_HEIGHT
+
+  return (
+    <div className="mt-4">
+      <svg
+        viewBox={`0 0 ${TIMELINE_WIDTH} ${height}`}
+        preserveAspectRatio="none"
+        className="w-full"
+        style={{ height: `${height}px` }}
+      >
+        <path d={waveformPath} stroke="#3b82f6" strokeWidth={columnWidth} fill="none" />
+        {lanes.map((lane, laneIdx) => (
+          <g key={lane.speaker}>
+            <title>{getSpeakerName(lane.speaker)}</title>
+            {lane.runs.map(run => (
+              <rect
+                key={run.start}
+                x={run.start * frameScale}
+                y={WAVEFORM_HEIGHT + laneIdx * LANE_HEIGHT + 2}
+                width={Math.max((run.end - run.start) * frameScale, 0.5)}
+                height={LANE_HEIGHT - 4}
+                fill={`hsl(${(laneIdx * 67) % 360}, 65%, 55%)`}
+              />
+            ))}
+          </g>
+        ))}
+      </svg>
+      <div className="flex flex-wrap gap-3 mt-2 text-xs text-gray-600">
+        {lanes.map((lane, laneIdx) => (
+          <span key={lane.speaker} className="flex items-center gap-1">
+            <span
+              className="inline-block w-3 h-3 rounded-sm"
+              style={{ backgroundColor: `hsl(${(laneIdx * 67) % 360}, 65%, 55%)` }}
+            />
+            {getSpeakerName(lane.speaker)}
+          </span>
+        ))}
+      </div>
+    </div>
+  )
+}
@@ -0,0 +1,220 @@
+// lib/search.ts
+import { Db, ObjectId } from 'mongodb';
+import { loadCompactTranscript } from '@/lib/transcripts';
+
+const POSTINGS_COLLECTION = 'transcriptPostings';
+
+// Must match the tokenizer in python-worker/search_index.py (NFC text)
+const TOKEN_PATTERN = /[\p{L}\p{M}\p{N}_]+/gu;
+const MIN_TOKEN_LENGTH = 2;
+const SNIPPET_RADIUS = 60;
+const STOP_WORDS = new Set([
+  'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'if', 'in',
+  'is', 'it', 'of', 'on', 'or', 'so', 'that', 'the', 'this', 'to', 'was',
+  'we', 'with', 'you', 'uh', 'um'
+]);
+
+export function tokenize(text: string): string[] {
+  return (text.normalize('NFC').match(TOKEN_PATTERN) || [])
+    .map(token => token.toLowerCase())
+    // Count code points like Python's len()
+    .filter(token => Array.from(token).length >= MIN_TOKEN_LENGTH && !STOP_WORDS.has(token));
+}
+
+/**
+ * Text around the first occurrence of one of `tokens`, cut at word
+ * boundaries and marked with ellipses.
+ */
+export function makeSnippet(text: string, tokens: Set<string>): string {
+  const normalized = text.normalize('NFC');
+  let start = 0;
+  let end = 0;
+  for (const match of normalized.matchAll(TOKEN_PATTERN)) {
+    if (tokens.has(match[0].toLowerCase())) {
+      start = match.index!;
+      end = start + match[0].length;
+      break;
+    }
+  }
+
+  let left = Math.max(0, start - SNIPPET_RADIUS);
+  let right = Math.min(normalized.length, end + SNIPPET_RADIUS);
+  if (left > 0) {
+    const space = normalized.indexOf(' ', left);
+    if (space !== -1 && space < start) left = space + 1;
+  }
+  if (right < normalized.length) {
+    const space = normalized.lastIndexOf(' ', right);
+    if (space >= end) right = space;
+  }
+  return (left > 0 ? '…' : '')
+    + normalized.slice(left, right).trim()
+    + (right < normalized.length ? '…' : '');
+}
+
+export interface SearchOptions {
+  query: string;
+  speaker?: string | null; // Tag name, known speaker name or raw speaker label
+  meetingId?: string | null;
+  recordingId?: string | null;
+  from?: Date | null;
+  to?: Date | null;
+  limit?: number;
+}
+
+export interface SearchHit {
+  segmentId: ObjectId;
+  recordingId: ObjectId;
+  meetingId: ObjectId | null;
+  speakerLabel: string;
+  identifiedSpeakerId: ObjectId | null;
+  startTime: Date;
+  offsetSeconds: number;
+  score: number;
+  snippet?: string; // Text around the first query word in the segment
+  transcription?: string;
+}
+
+function escapeRegex(value: string): string {
+  return value.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+}
+
+/**
+ * Build a postings filter matching a speaker by user-assigned tag name,
+ * known speaker name or diarization label.
+ */
+async function buildSpeakerFilter(db: Db, speaker: string): Promise<any> {
+  const nameRegex = new RegExp(`^${escapeRegex(speaker)}$`, 'i');
+
+  const tags = await db.collection('speakerTags')
+    .find({ userAssignedName: nameRegex })
+    .project({ recordingId: 1, speakerLabel: 1 })
+    .toArray();
+  const knownSpeakers = await db.collection('knownSpeakers')
+    .find({ name: nameRegex })
+    .project({ _id: 1 })
+    .toArray();
+
+  const clauses: any[] = [{ speakerLabel: speaker }];
+  for (const tag of tags) {
+    clauses.push({ recordingId: tag.recordingId, speakerLabel: tag.speakerLabel });
+  }
+  if (knownSpeakers.length > 0) {
+    clauses.push({ identifiedSpeakerId: { $in: knownSpeakers.map(s => s._id) } });
+  }
+  return { $or: clauses };
+}
+
+/**
+ * Search transcripts using the precomputed postings written by the worker.
+ * All query tokens must occur in a segment for it to match.
+ */
+export async function searchTranscripts(
+  db: Db,
+  options: SearchOptions
+): Promise<SearchHit[]> {
+  const tokens = Array.from(new Set(tokenize(options.query)));
+  if (tokens.length === 0) {
+    return [];
+  }
+
+  const filter: any = { token: { $in: tokens } };
+  if (options.meetingId) {
+    filter.meetingId = new ObjectId(options.meetingId);
+  }
+  if (options.recordingId) {
+    filter.recordingId = new ObjectId(options.recordingId);
+  }
+  if (options.from || options.to) {
+    filter.recordingStart = {};
+    if (options.from) filter.recordingStart.$gte = options.from;
+    if (options.to) filter.recordingStart.$lte = options.to;
+  }
+  if (options.speaker) {
+    Object.assign(filter, await buildSpeakerFilter(db, options.speaker));
+  }
+
+  const postings = await db.collection(POSTINGS_COLLECTION)
+    .find(filter)
+    // Snippets were stored by older indexers; they are built per hit below
+    .project({ indexedAt: 0, snippets: 0 })
+    .toArray();
+
+  // Intersect postings per segment
+  const matches = new Map<string, { hit: SearchHit; tokens: Set<string> }>();
+  for (const posting of postings) {
+    posting.segmentIds.forEach((segmentId: ObjectId, idx: number) => {
+      const key = segmentId.toString();
+      let match = matches.get(key);
+      if (!match) {
+        const offsetSeconds = posting.offsets[idx];
+        match = {
+          hit: {
+            segmentId,
+            recordingId: posting.recordingId,
+            meetingId: posting.meetingId || null,
+            speakerLabel: posting.speakerLabel,
+            identifiedSpeakerId: posting.identifiedSpeakerId || null,
+            startTime: new Date(posting.recordingStart.getTime() + offsetSeconds * 1000),
+            offsetSeconds,
+            score: 0
+          },
+          tokens: new Set()
+        };
+        matches.set(key, match);
+      }
+      match.tokens.add(posting.token);
+      match.hit.score += posting.termFrequencies[idx];
+    });
+  }
+
+  const hits = Array.from(matches.values())
+    .filter(match => match.tokens.size === tokens.length)
+    .map(match => match.hit)
+    .sort((a, b) => b.score - a.score || b.startTime.getTime() - a.startTime.getTime())
+    .slice(0, options.limit || 50);
+
+  // Attach text and snippets for the returned hits only. Compact transcripts
+  // keep no text on the segments, so those are read once per recording.
+  const segments = hits.length > 0
+    ? await db.collection('speakerSegments')
+      .find({ _id: { $in: hits.map(hit => hit.segmentId) } })
+      .project({ transcription: 1 })
+      .toArray()
+    : [];
+  const textById = new Map<string, string>();
+  for (const segment of segments) {
+    if (segment.transcription) {
+      textById.set(segment._id.toString(), segment.transcription);
+    }
+  }
+  const compactRecordingIds = new Set(
+    hits
+      .filter(hit => !textById.has(hit.segmentId.toString()))
+      .map(hit => hit.recordingId.toString())
+  );
+  for (const recordingId of Array.from(compactRecordingIds)) {
+    const compact = await loadCompactTranscript(db, new ObjectId(recordingId));
+    for (const segment of compact || []) {
+      textById.set(segment._id.toString(), segment.transcription);
+    }
+  }
+
+  const tokenSet = new Set(tokens);
+  for (const hit of hits) {
+    const text = textById.get(hit.segmentId.toString());
+    if (text) {
+      hit.transcription = text;
+      hit.snippet = makeSnippet(text, tokenSet);
+    }
+  }
+
+  return hits;
+}
+
+export async function deleteSearchPostings(
+  db: Db,
+  recordingId: ObjectId
+): Promise<void> {
+  await db.collection(POSTINGS_COLLECTION).deleteMany({ recordingId });
+}
@@ -1,7 +1,9 @@
 // lib/storage.ts
-import { writeFile, mkdir, unlink } from 'fs/promises';
+import { writeFile, mkdir, unlink, rm, stat } from 'fs/promises';
 import { join } from 'path';
-import { existsSync } from 'fs';
+import { existsSync, createReadStream } from 'fs';
+import { Readable } from 'stream';
+import { NextResponse } from 'next/server';
 
 const STORAGE_PATH = process.env.STORAGE_PATH || '/app/storage';
 
@@ -31,6 +33,76 @@ export async function deleteFile(filePath: string): Promise<void> {
   }
 }
 
+export async function deleteDirectory(dirPath: string): Promise<void> {
+  if (existsSync(dirPath)) {
+    await rm(dirPath, { recursive: true, force: true });
+  }
+}
+
+/**
+ * Stream bytes [start, end] (inclusive) of a file without buffering it in memory
+ */
+export function streamFileRange(
+  filePath: string,
+  start: number,
+  end: number
+): ReadableStream {
+  const stream = createReadStream(filePath, { start, end });
+  return Readable.toWeb(stream) as unknown as ReadableStream;
+}
+
+/**
+ * Build a streaming response for a file, honouring a single HTTP byte range
+ * (`Range: bytes=start-end`, `bytes=start-` or `bytes=-suffix`).
+ */
+export async function createFileResponse(
+  filePath: string,
+  contentType: string,
+  rangeHeader: string | null
+): Promise<NextResponse> {
+  const { size } = await stat(filePath);
+  const headers: Record<string, string> = {
+    'Content-Type': contentType,
+    'Accept-Ranges': 'bytes'
+  };
+
+  const match = rangeHeader ? /^bytes=(\d*)-(\d*)$/.exec(rangeHeader.trim()) : null;
+  if (!match || (match[1] === '' && match[2] === '')) {
+    if (size === 0) {
+      return new NextResponse(null, { headers: { ...headers, 'Content-Length': '0' } });
+    }
+    return new NextResponse(streamFileRange(filePath, 0, size - 1), {
+      headers: { ...headers, 'Content-Length': size.toString() }
+    });
+  }
+
+  let start: number;
+  let end: number;
+  if (match[1] === '') {
+    start = Math.max(0, size - parseInt(match[2], 10));
+    end = size - 1;
+  } else {
+    start = parseInt(match[1], 10);
+    end = match[2] === '' ? size - 1 : Math.min(parseInt(match[2], 10), size - 1);
+  }
+
+  if (start >= size || start > end) {
+    return new NextResponse(null, {
+      status: 416,
+      headers: { ...headers, 'Content-Range': `bytes */${size}` }
+    });
+  }
+
+  return new NextResponse(streamFileRange(filePath, start, end), {
+    status: 206,
+    headers: {
+      ...headers,
+      'Content-Length': (end - start + 1).toString(),
+      'Content-Range': `bytes ${start}-${end}/${size}`
+    }
+  });
+}
+
 export function getStoragePath(): string {
   return STORAGE_PATH;
 }
@@ -0,0 +1,121 @@
+// lib/transcripts.ts
+import { Db, GridFSBucket, ObjectId } from 'mongodb';
+import type { CompactTranscriptColumns } from '@/types/recording';
+
+const TRANSCRIPTS_COLLECTION = 'recordingTranscripts';
+const TRANSCRIPTS_BUCKET = 'transcripts';
+
+async function readGridFSColumns(
+  db: Db,
+  fileId: ObjectId
+): Promise<CompactTranscriptColumns> {
+  const bucket = new GridFSBucket(db, { bucketName: TRANSCRIPTS_BUCKET });
+  const chunks: Buffer[] = [];
+  for await (const chunk of bucket.openDownloadStream(fileId)) {
+    chunks.push(chunk as Buffer);
+  }
+  const columns = JSON.parse(Buffer.concat(chunks).toString('utf-8'));
+  columns.segmentIds = columns.segmentIds.map((id: string) => new ObjectId(id));
+  columns.identifiedSpeakerIds = (columns.identifiedSpeakerIds || []).map(
+    (id: string | null) => (id ? new ObjectId(id) : null)
+  );
+  return columns;
+}
+
+/**
+ * Expand a compact transcript into documents shaped like `speakerSegments`.
+ * Text offsets are UTF-16 code units, so `String.slice` can be used directly.
+ */
+function expandColumns(
+  recordingId: ObjectId,
+  recordingStart: Date,
+  columns: CompactTranscriptColumns
+): any[] {
+  const startMs = recordingStart.getTime();
+  const identified = columns.identifiedSpeakerIds || [];
+
+  return columns.segmentIds.map((segmentId, idx) => {
+    const start = columns.starts[idx];
+    const end = columns.ends[idx];
+    const transcriptionSegments = [];
+    for (let sub = columns.turnSubOffsets[idx]; sub < columns.turnSubOffsets[idx + 1]; sub++) {
+      transcriptionSegments.push({
+        startOffset: columns.subStarts[sub],
+        endOffset: columns.subEnds[sub],
+        text: columns.text.slice(columns.subTextOffsets[sub], columns.subTextOffsets[sub + 1]),
+        confidence: columns.subConfidence[sub]
+      });
+    }
+
+    const segment: any = {
+      _id: segmentId,
+      recordingId,
+      speakerLabel: columns.speakers[columns.speakerIdx[idx]],
+      startTime: new Date(startMs + start * 1000),
+      endTime: new Date(startMs + end * 1000),
+      durationSeconds: end - start,
+      confidenceScore: columns.confidenceScores[idx],
+      transcription: transcriptionSegments.map(s => s.text).join(' '),
+      transcriptionSegments
+    };
+    if (identified[idx]) {
+      segment.identifiedSpeakerId = identified[idx];
+    }
+    return segment;
+  });
+}
+
+/**
+ * Load the compact transcript of a recording written by the worker
+ * (TRANSCRIPT_STORAGE=compact or migrate_transcripts.py).
+ * @returns segments sorted by start time, or null if the recording has no compact transcript
+ */
+export async function loadCompactTranscript(
+  db: Db,
+  recordingId: ObjectId
+): Promise<any[] | null> {
+  const doc = await db.collection(TRANSCRIPTS_COLLECTION).findOne({ recordingId });
+  if (!doc) {
+    return null;
+  }
+
+  const columns = doc.storage === 'gridfs'
+    ? await readGridFSColumns(db, doc.gridFsId)
+    : doc.columns;
+
+  return expandColumns(recordingId, doc.recordingStart, columns);
+}
+
+/**
+ * Load the segments of a recording, preferring the compact transcript and
+ * falling back to the per-segment `speakerSegments` documents.
+ */
+export async function loadTranscriptSegments(
+  db: Db,
+  recordingId: ObjectId
+): Promise<any[]> {
+  const compact = await loadCompactTranscript(db, recordingId);
+  if (compact) {
+    return compact;
+  }
+
+  return db.collection('speakerSegments')
+    .find({ recordingId })
+    .sort({ startTime: 1 })
+    .toArray();
+}
+
+export async function deleteCompactTranscript(
+  db: Db,
+  recordingId: ObjectId
+): Promise<void> {
+  const doc = await db.collection(TRANSCRIPTS_COLLECTION).findOne({ recordingId });
+  if (!doc) {
+    return;
+  }
+  if (doc.gridFsId) {
+    const bucket = new GridFSBucket(db, { bucketName: TRANSCRIPTS_BUCKET });
+    await bucket.delete(doc.gridFsId).catch(() => undefined);
+  }
+  await db.collection(TRANSCRIPTS_COLLECTION).deleteOne({ _id: doc._id });
+}
@@ -6,6 +6,7 @@ export interface Recording {
   filePath: string;
   fileSize: number;
   durationSeconds: number;
+  durationProbeFailed?: boolean; // Worker could not read the duration from the file
   startTime: Date;
   language?: string | null; // Language code for transcription (null = auto-detect)
   minSpeakers?: number | null; // Minimum number of speakers for diarization
@@ -16,10 +17,32 @@ export interface Recording {
   status: 'pending' | 'processing' | 'completed' | 'failed';
   progress: number;
   errorMessage?: string;
+  waveform?: RecordingWaveform | null;
   createdAt: Date;
   updatedAt: Date;
 }
 
+export interface WaveformLevel {
+  samplesPerBin: number;
+  binsPerSecond: number;
+  binCount: number; // Each bin is 3 int8 values: min, max, rms
+}
+
+// Summary written by the worker, served by /api/recordings/[id]/waveform
+export interface RecordingWaveform {
+  version: number;
+  sampleRate: number;
+  numSamples: number;
+  durationSeconds: number;
+  levels: WaveformLevel[];
+  activity: {
+    frameSeconds: number;
+    frameCount: number;
+    bytesPerSpeaker: number; // One packed bit row (MSB first) per speaker
+    speakers: string[];
+  };
+}
+
 export interface KnownSpeaker {
   _id: string;
   name: string;
@@ -53,6 +76,37 @@ export interface SpeakerSegment {
   createdAt: Date;
 }
 
+// Columnar transcript stored once per recording in `recordingTranscripts`
+export interface CompactTranscriptColumns {
+  segmentIds: any[];
+  speakers: string[];
+  speakerIdx: number[];
+  identifiedSpeakerIds: (any | null)[];
+  confidenceScores: number[];
+  starts: number[]; // Seconds from recording start
+  ends: number[];
+  turnSubOffsets: number[]; // Index into sub* arrays, one more entry than segments
+  subStarts: number[]; // Seconds from segment start
+  subEnds: number[];
+  subConfidence: number[];
+  subTextOffsets: number[]; // UTF-16 offsets into text, one more entry than sub-segments
+  text: string;
+}
+
+export interface CompactTranscript {
+  _id: string;
+  recordingId: string;
+  version: number;
+  recordingStart: Date;
+  segmentCount: number;
+  storage: 'inline' | 'gridfs';
+  columns: CompactTranscriptColumns | null;
+  gridFsId: string | null;
+  sizeBytes: number;
+  createdAt: Date;
+  updatedAt: Date;
+}
+
 export interface JobStep {
   name: string;
   status: 'queued' | 'running' | 'completed' | 'failed';
@@ -61,10 +115,21 @@ export interface JobStep {
   completedAt?: Date;
 }
 
+export interface ResourceEstimate {
+  durationSeconds: number;
+  durationUnknown?: boolean; // Probe failed; the whole budget is reserved
+  executionMode: 'standard' | 'low_memory' | 'diarize' | 'identify' | 'identify_low_memory' | 'transcribe';
+  memoryMb: number;
+  cpuSeconds: number;
+  cpuThreads: number;
+  calibrationSamples: number;
+  whisperModel: string;
+}
+
 export interface ProcessingJob {
   _id: string;
   recordingId: string;
-  jobType: 'diarization' | 'identification' | 'transcription' | 'full';
+  jobType: 'diarization' | 'identification' | 'transcription' | 'full' | 'stage';
   status: 'queued' | 'running' | 'completed' | 'failed';
   progress: number;
   errorMessage?: string;
@@ -72,6 +137,21 @@ export interface ProcessingJob {
   minSpeakers?: number | null; // Minimum number of speakers for diarization
   maxSpeakers?: number | null; // Maximum number of speakers for diarization
   steps: JobStep[];
+  executionMode?: 'standard' | 'low_memory' | 'diarize' | 'identify' | 'identify_low_memory' | 'transcribe'; // Chosen by worker admission control
+  resourceEstimate?: ResourceEstimate;
+  workerNode?: string;
+  heartbeatAt?: Date;
+  pipeline?: 'staged'; // Set when the job was split into stage tasks
+  transcriptionShards?: number;
+  shardsDone?: number[]; // Indexes of finished transcription shards
+  // Stage task fields (jobType 'stage')
+  stage?: 'diarize' | 'identify' | 'transcribe';
+  parentJobId?: string;
+  shardIndex?: number;
+  shardCount?: number;
+  segmentIds?: string[];
+  retries?: number; // Requeues after the claiming worker was lost
+  durationSeconds?: number;
   startedAt?: Date;
   completedAt?: Date;
   createdAt: Date;
@@ -0,0 +1,551 @@
+# admission.py
+import os
+import time
+import socket
+import resource
+import threading
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+import soundfile as sf
+import librosa
+
+
+def get_env_int(var_name: str, default: int) -> int:
+    value = os.getenv(var_name)
+    if value is None or value.strip() == "":
+        return default
+    try:
+        parsed = int(value)
+        if parsed <= 0:
+            raise ValueError
+        return parsed
+    except ValueError:
+        print(
+            f"Invalid integer for {var_name}='{value}', using default {default}",
+            flush=True
+        )
+        return default
+
+
+def _read_int_file(path: str):
+    try:
+        with open(path) as f:
+            value = f.read().strip().split()[0]
+        return None if value == "max" else int(value)
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def detect_memory_limit_mb():
+    """Container memory limit from cgroup v2/v1, or None when unlimited"""
+    for path in ("/sys/fs/cgroup/memory.max", "/sys/fs/cgroup/memory/memory.limit_in_bytes"):
+        limit = _read_int_file(path)
+        # cgroup v1 reports a huge number when unlimited
+        if limit and limit < 1 << 50:
+            return limit // (1024 * 1024)
+    return None
+
+
+def detect_cpu_limit():
+    """Container CPU limit from cgroup v2 cpu.max, falling back to the CPU count"""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().strip().split()
+        if quota != "max":
+            return max(1.0, int(quota) / int(period))
+    except (OSError, ValueError):
+        pass
+    return float(os.cpu_count() or 1)
+
+
+class ResourceMonitor:
+    """Sample this process's RSS while a job runs and keep the job heartbeat fresh.
+
+    Used as a context manager around process_recording; afterwards
+    `peak_memory_mb`, `wall_seconds` and `cpu_seconds` hold the measurements.
+    The worker process outlives its jobs and allocators rarely return memory, so
+    `memory_increase_mb` (peak over the RSS at job start) is what a job costs.
+    """
+    SAMPLE_INTERVAL_SECONDS = 0.5
+    HEARTBEAT_INTERVAL_SECONDS = 30
+
+    def __init__(self, db=None, job_id=None):
+        self.db = db
+        self.job_id = job_id
+        self.peak_memory_mb = 0.0
+        self.start_memory_mb = 0.0
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def current_rss_mb():
+        try:
+            page_size = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * page_size / (1024 * 1024)
+        except (OSError, ValueError, IndexError):
+            # ru_maxrss is the lifetime peak in KB on Linux, better than nothing
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    @property
+    def memory_increase_mb(self):
+        return max(0.0, self.peak_memory_mb - self.start_memory_mb)
+
+    def _heartbeat(self):
+        if self.db is not None and self.job_id is not None:
+            self.db.processingJobs.update_one(
+                {"_id": self.job_id},
+                {"$set": {"heartbeatAt": datetime.utcnow()}}
+            )
+
+    def _run(self):
+        last_heartbeat = 0.0
+        while not self._stop.is_set():
+            self.peak_memory_mb = max(self.peak_memory_mb, self.current_rss_mb())
+            now = time.monotonic()
+            if now - last_heartbeat >= self.HEARTBEAT_INTERVAL_SECONDS:
+                try:
+                    self._heartbeat()
+                except Exception as e:
+                    print(f"Warning: job heartbeat failed: {e}", flush=True)
+                last_heartbeat = now
+            self._stop.wait(self.SAMPLE_INTERVAL_SECONDS)
+
+    def __enter__(self):
+        self._started = time.monotonic()
+        self._cpu_started = time.process_time()
+        self.start_memory_mb = self.current_rss_mb()
+        self.peak_memory_mb = self.start_memory_mb
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        self.peak_memory_mb = max(self.peak_memory_mb, self.current_rss_mb())
+        self.wall_seconds = time.monotonic() - self._started
+        self.cpu_seconds = time.process_time() - self._cpu_started
+        return False
+
+
+class ResourceModel:
+    """Estimate peak memory and CPU time of a job from the recording duration.
+
+    peak_memory_mb = intercept + slope * minutes, fitted by least squares over
+    recent measurements in `resourceProfiles` for the same Whisper model and
+    execution mode. Until enough measurements exist, conservative defaults are
+    used. Estimates only cover the memory a job adds to its worker process; the
+    loaded models are part of the process baseline, which AdmissionController
+    counts for every worker process on the node whether it runs a job or not.
+    """
+    COLLECTION = "resourceProfiles"
+    # Profiles measured before estimates excluded the models are ignored
+    MEMORY_BASIS = "increase"
+    # Working memory of a job on top of the loaded models, in MB
+    DEFAULT_INTERCEPT_MB = {
+        "standard": 1000, "low_memory": 500,
+        "diarize": 500, "identify": 300, "identify_low_memory": 100, "transcribe": 300
+    }
+    # Modes: full jobs ("standard", "low_memory") and stage tasks (see stages.py)
+    DEFAULT_SLOPE_MB_PER_MINUTE = {
+        "standard": 30.0, "low_memory": 20.0,
+        "diarize": 30.0, "identify": 5.0, "identify_low_memory": 1.0, "transcribe": 2.0
+    }
+    # CPU seconds per audio second (base model on CPU, see README "Performance")
+    DEFAULT_CPU_SECONDS_PER_AUDIO_SECOND = {
+        "standard": 1.25, "low_memory": 1.25,
+        "diarize": 0.5, "identify": 0.05, "identify_low_memory": 0.05, "transcribe": 0.75
+    }
+    # Fallback for jobs over the whole budget. Diarize always decodes to disk
+    # and transcribe shards are already small, so they have none.
+    LOW_MEMORY_MODES = {"standard": "low_memory", "identify": "identify_low_memory"}
+    SAFETY_FACTOR = 1.2
+    MIN_SAMPLES = 3
+    MAX_SAMPLES = 50
+    REFIT_INTERVAL_SECONDS = 300
+
+    def __init__(self, db, whisper_model_name: str):
+        self.db = db
+        self.whisper_model_name = whisper_model_name
+        self._fits = {}
+        self._fitted_at = {}
+        self.baseline_mb = 0.0
+
+    def measure_baseline(self):
+        """Record the worker's RSS with its models loaded and no job running"""
+        self.baseline_mb = ResourceMonitor.current_rss_mb()
+        return self.baseline_mb
+
+    def _default_fit(self, mode: str):
+        return {
+            "intercept": float(self.DEFAULT_INTERCEPT_MB[mode]),
+            "slope": self.DEFAULT_SLOPE_MB_PER_MINUTE[mode],
+            "cpuPerSecond": self.DEFAULT_CPU_SECONDS_PER_AUDIO_SECOND[mode],
+            "samples": 0
+        }
+
+    def _fit(self, mode: str):
+        samples = list(
+            self.db[self.COLLECTION]
+            .find({
+                "whisperModel": self.whisper_model_name,
+                "executionMode": mode,
+                "memoryBasis": self.MEMORY_BASIS
+            })
+            .sort("createdAt", -1)
+            .limit(self.MAX_SAMPLES)
+        )
+        fit = self._default_fit(mode)
+        if len(samples) < self.MIN_SAMPLES:
+            return fit
+
+        xs = [s["durationSeconds"] / 60 for s in samples]
+        ys = [s["peakMemoryMb"] for s in samples]
+        mean_x = sum(xs) / len(xs)
+        mean_y = sum(ys) / len(ys)
+        var_x = sum((x - mean_x) ** 2 for x in xs)
+        slope = 0.0
+        if var_x > 0:
+            slope = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+        if slope > 0:
+            fit["slope"] = slope
+            fit["intercept"] = mean_y - slope * mean_x
+        else:
+            # Memory never shrinks with longer audio: keep the default slope and
+            # raise the intercept until every measurement is covered
+            fit["intercept"] = max(y - fit["slope"] * x for x, y in zip(xs, ys))
+
+        total_audio = sum(s["durationSeconds"] for s in samples)
+        if total_audio > 0:
+            fit["cpuPerSecond"] = sum(s["cpuSeconds"] for s in samples) / total_audio
+        fit["samples"] = len(samples)
+        return fit
+
+    def get_fit(self, mode: str):
+        now = time.monotonic()
+        if mode not in self._fits or now - self._fitted_at[mode] > self.REFIT_INTERVAL_SECONDS:
+            self._fits[mode] = self._fit(mode)
+            self._fitted_at[mode] = now
+        return self._fits[mode]
+
+    def estimate(self, duration_seconds: float, mode: str = "standard"):
+        fit = self.get_fit(mode)
+        minutes = duration_seconds / 60
+        return {
+            "durationSeconds": duration_seconds,
+            "executionMode": mode,
+            "memoryMb": round((fit["intercept"] + fit["slope"] * minutes) * self.SAFETY_FACTOR),
+            "cpuSeconds": round(fit["cpuPerSecond"] * duration_seconds),
+            "calibrationSamples": fit["samples"],
+            "whisperModel": self.whisper_model_name
+        }
+
+    def record(self, job, monitor: ResourceMonitor):
+        """Store the measured peak of a finished job and refit on next estimate"""
+        estimate = job.get("resourceEstimate") or {}
+        if not estimate.get("durationSeconds"):
+            return
+        mode = estimate.get("executionMode", "standard")
+        self.db[self.COLLECTION].insert_one({
+            "jobId": job["_id"],
+            "whisperModel": self.whisper_model_name,
+            "executionMode": mode,
+            "durationSeconds": estimate["durationSeconds"],
+            "estimatedMemoryMb": estimate.get("memoryMb"),
+            "peakMemoryMb": round(monitor.memory_increase_mb),
+            "memoryBasis": self.MEMORY_BASIS,
+            "baselineMemoryMb": round(self.baseline_mb),
+            "wallSeconds": round(monitor.wall_seconds, 1),
+            "cpuSeconds": round(monitor.cpu_seconds, 1),
+            "createdAt": datetime.utcnow()
+        })
+        self._fits.pop(mode, None)
+
+
+class AdmissionController:
+    """Claim only the queued jobs that fit the node's remaining memory/CPU budget.
+
+    Worker processes sharing a node (same WORKER_NODE_ID, by default the
+    container hostname) share the budget through the `resourceEstimate` stored
+    on their running jobs. Each process also registers its baseline memory
+    (models loaded, no job) in `workerProcesses`; the baselines of all live
+    processes on the node are taken off the budget before jobs are packed.
+    Jobs whose standard estimate exceeds the remaining budget run in
+    low-memory mode, and only when the node is otherwise idle. A job that
+    has waited longer than WORKER_ADMISSION_MAX_WAIT_MINUTES stops smaller jobs
+    from being claimed so the node drains for it.
+    """
+    DEFAULT_MEMORY_BUDGET_MB = 16384
+    # Keep headroom below the container limit for the OS and Python overhead
+    MEMORY_BUDGET_FRACTION = 0.9
+    STALE_HEARTBEAT_MINUTES = 5
+    PROCESS_COLLECTION = "workerProcesses"
+    PROCESS_HEARTBEAT_SECONDS = 30
+    MAX_CANDIDATES = 20
+    DEFAULT_MAX_WAIT_MINUTES = 30
+
+    def __init__(self, db, model: ResourceModel, cpu_threads: int):
+        self.db = db
+        self.model = model
+        self.cpu_threads = cpu_threads
+        self.node_id = os.getenv("WORKER_NODE_ID") or socket.gethostname()
+
+        memory_budget = get_env_int("WORKER_MEMORY_BUDGET_MB", 0)
+        if not memory_budget:
+            limit = detect_memory_limit_mb() or self.DEFAULT_MEMORY_BUDGET_MB
+            memory_budget = int(limit * self.MEMORY_BUDGET_FRACTION)
+        self.memory_budget_mb = memory_budget
+        self.cpu_budget = get_env_int("WORKER_CPU_BUDGET", 0) or detect_cpu_limit()
+        self.max_wait = timedelta(minutes=get_env_int(
+            "WORKER_ADMISSION_MAX_WAIT_MINUTES",
+            self.DEFAULT_MAX_WAIT_MINUTES
+        ))
+        self.process_baselines_mb = 0.0
+        self._process_id = None
+        self._process_stop = threading.Event()
+        print(
+            f"Admission control: node={self.node_id}, memory budget={self.memory_budget_mb} MB, "
+            f"cpu budget={self.cpu_budget:g}",
+            flush=True
+        )
+
+    def register_process(self, baseline_mb: float):
+        """Announce this worker process and keep its baseline counted while it lives"""
+        self._process_id = self.db[self.PROCESS_COLLECTION].insert_one({
+            "nodeId": self.node_id,
+            "pid": os.getpid(),
+            "baselineMb": round(baseline_mb),
+            "startedAt": datetime.utcnow(),
+            "heartbeatAt": datetime.utcnow()
+        }).inserted_id
+        threading.Thread(target=self._process_heartbeat, daemon=True).start()
+
+    def _process_heartbeat(self):
+        while not self._process_stop.wait(self.PROCESS_HEARTBEAT_SECONDS):
+            try:
+                self.db[self.PROCESS_COLLECTION].update_one(
+                    {"_id": self._process_id},
+                    {"$set": {"heartbeatAt": datetime.utcnow()}}
+                )
+            except Exception as e:
+                print(f"Warning: worker heartbeat failed: {e}", flush=True)
+
+    def unregister_process(self):
+        self._process_stop.set()
+        if self._process_id is not None:
+            self.db[self.PROCESS_COLLECTION].delete_one({"_id": self._process_id})
+
+    def refresh_process_baselines(self):
+        """Total baseline memory of the live worker processes on this node"""
+        stale_before = datetime.utcnow() - timedelta(minutes=self.STALE_HEARTBEAT_MINUTES)
+        processes = self.db[self.PROCESS_COLLECTION].find(
+            {"nodeId": self.node_id, "heartbeatAt": {"$gte": stale_before}},
+            {"baselineMb": 1}
+        )
+        self.process_baselines_mb = sum(p.get("baselineMb", 0) for p in processes)
+        return self.process_baselines_mb
+
+    @property
+    def job_memory_budget_mb(self):
+        """Memory left for jobs once every live worker process's models are counted"""
+        return max(0, self.memory_budget_mb - self.process_baselines_mb)
+
+    def get_duration_seconds(self, recording):
+        """Recording duration, probing the file header when it is not stored yet
+        
+        Returns None when the duration cannot be probed. The failure is stored on
+        the recording so the probe is not repeated on every poll.
+        """
+        if recording.get("durationSeconds"):
+            return float(recording["durationSeconds"])
+        if recording.get("durationProbeFailed"):
+            return None
+        path = recording.get("filePath")
+        try:
+            duration = sf.info(path).duration
+        except Exception:
+            try:
+                duration = librosa.get_duration(path=path)
+            except Exception as e:
+                print(f"Warning: could not probe duration of {path}: {e}", flush=True)
+                self.db.recordings.update_one(
+                    {"_id": recording["_id"]},
+                    {"$set": {"durationProbeFailed": True}}
+                )
+                return None
+        self.db.recordings.update_one(
+            {"_id": recording["_id"]},
+            {"$set": {"durationSeconds": duration}}
+        )
+        return duration
+
+    def estimate_job(self, job):
+        """Estimate a queued job from the current calibration and budget
+        
+        Recomputed on every claim attempt so queued jobs pick up new
+        measurements and budget changes; stored only when the job is claimed.
+        A job of unknown duration reserves the whole budget, so it only runs on
+        an otherwise idle node, and uses low-memory mode where one exists.
+        """
+        duration = job.get("durationSeconds")
+        if not duration:
+            recording = self.db.recordings.find_one(
+                {"_id": job["recordingId"]},
+                {"durationSeconds": 1, "durationProbeFailed": 1, "filePath": 1}
+            )
+            duration = self.get_duration_seconds(recording) if recording else 0.0
+        # Stage tasks are costed by their own profile (shards by their audio length)
+        mode = job["stage"] if job.get("jobType") == "stage" else "standard"
+        low_memory_mode = self.model.LOW_MEMORY_MODES.get(mode)
+        if duration is None:
+            estimate = self.model.estimate(0.0, low_memory_mode or mode)
+            estimate["memoryMb"] = self.job_memory_budget_mb
+            estimate["durationUnknown"] = True
+        else:
+            estimate = self.model.estimate(duration, mode)
+            if estimate["memoryMb"] > self.job_memory_budget_mb and low_memory_mode:
+                estimate = self.model.estimate(duration, low_memory_mode)
+        estimate["cpuThreads"] = self.cpu_threads
+        return estimate
+
+    def get_live_jobs(self):
+        """Running jobs on this node whose worker is still sending heartbeats"""
+        stale_before = datetime.utcnow() - timedelta(minutes=self.STALE_HEARTBEAT_MINUTES)
+        return list(self.db.processingJobs.find(
+            {
+                "status": "running",
+                "workerNode": self.node_id,
+                "$or": [
+                    {"heartbeatAt": {"$gte": stale_before}},
+                    {"heartbeatAt": {"$exists": False}, "startedAt": {"$gte": stale_before}}
+                ]
+            },
+            {"resourceEstimate": 1, "startedAt": 1}
+        ))
+
+    @staticmethod
+    def sum_usage(jobs):
+        memory_mb = 0
+        cpu_threads = 0
+        for job in jobs:
+            estimate = job.get("resourceEstimate") or {}
+            memory_mb += estimate.get("memoryMb", 0)
+            cpu_threads += estimate.get("cpuThreads", 0)
+        return memory_mb, cpu_threads, len(jobs)
+
+    def get_usage(self):
+        """Memory and CPU threads reserved by live jobs on this node"""
+        return self.sum_usage(self.get_live_jobs())
+
+    @staticmethod
+    def claim_order(job):
+        return (job.get("startedAt") or datetime.min, job["_id"])
+
+    def would_admit(self, job):
+        """Whether `job` fits the node's remaining budget right now"""
+        self.refresh_process_baselines()
+        return self.fits(self.estimate_job(job), self.get_usage())
+
+    def fits(self, estimate, usage):
+        memory_mb, cpu_threads, count = usage
+        if count == 0:
+            # An idle node always takes the job, even an oversized one
+            return True
+        return (
+            memory_mb + estimate["memoryMb"] <= self.job_memory_budget_mb
+            and cpu_threads + estimate.get("cpuThreads", 0) <= self.cpu_budget
+        )
+
+    def requeue_stale_tasks(self):
+        """Requeue stage tasks whose worker stopped sending heartbeats
+        
+        Counts the lost attempts in `retries`; StagePipeline fails a task once
+        its retries reach StagePipeline.MAX_RETRIES.
+        """
+        stale_before = datetime.utcnow() - timedelta(minutes=self.STALE_HEARTBEAT_MINUTES)
+        result = self.db.processingJobs.update_many(
+            {
+                "jobType": "stage",
+                "status": "running",
+                "$or": [
+                    {"heartbeatAt": {"$lt": stale_before}},
+                    {"heartbeatAt": {"$exists": False}, "startedAt": {"$lt": stale_before}}
+                ]
+            },
+            {
+                "$set": {"status": "queued"},
+                "$unset": {"workerNode": "", "heartbeatAt": "", "resourceEstimate": ""},
+                "$inc": {"retries": 1}
+            }
+        )
+        if result.modified_count:
+            print(f"Requeued {result.modified_count} stage tasks of lost workers", flush=True)
+        return result.modified_count
+
+    def claim_next_job(self, stages=None):
+        """Atomically claim the oldest queued job that fits, or return None
+        
+        Args:
+            stages: Claim stage tasks of these stages instead of full jobs.
+        """
+        if stages:
+            self.requeue_stale_tasks()
+        self.refresh_process_baselines()
+        usage = self.get_usage()
+        query = {"status": "queued", "jobType": {"$ne": "stage"}}
+        if stages:
+            query = {"status": "queued", "jobType": "stage", "stage": {"$in": list(stages)}}
+        candidates = self.db.processingJobs.find(
+            query,
+            sort=[("createdAt", 1)],  # FIFO among jobs that fit
+            limit=self.MAX_CANDIDATES
+        )
+        for candidate in candidates:
+            estimate = self.estimate_job(candidate)
+            if not self.fits(estimate, usage):
+                created_at = candidate.get("createdAt")
+                if created_at and datetime.utcnow() - created_at > self.max_wait:
+                    # Starving job: let running work drain instead of packing more
+                    return None
+                continue
+
+            job = self.db.processingJobs.find_one_and_update(
+                {"_id": candidate["_id"], "status": "queued"},
+                {"$set": {
+                    "status": "running",
+                    "startedAt": datetime.utcnow(),
+                    "heartbeatAt": datetime.utcnow(),
+                    "workerNode": self.node_id,
+                    "executionMode": estimate["executionMode"],
+                    "resourceEstimate": estimate
+                }},
+                return_document=ReturnDocument.AFTER
+            )
+            if not job:
+                # Claimed by another worker in the meantime
+                continue
+
+            # Another process on this node may have claimed concurrently. Only the
+            # later claim backs off, so two claimers never both give up and retry
+            earlier = [
+                other for other in self.get_live_jobs()
+                if other["_id"] != job["_id"] and self.claim_order(other) < self.claim_order(job)
+            ]
+            if not self.fits(estimate, self.sum_usage(earlier)):
+                self.db.processingJobs.update_one(
+                    {"_id": job["_id"], "status": "running"},
+                    {
+                        "$set": {"status": "queued"},
+                        "$unset": {
+                            "workerNode": "", "heartbeatAt": "", "startedAt": "",
+                            "executionMode": "", "resourceEstimate": ""
+                        }
+                    }
+                )
+                return None
+            return job
+        return None
+
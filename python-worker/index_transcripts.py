@@ -0,0 +1,55 @@
+# index_transcripts.py
+"""Build the transcript search index for recordings processed before indexing existed.
+
+Usage:
+    python index_transcripts.py                      # completed recordings not yet indexed
+    python index_transcripts.py --recording-id <id>  # a single recording
+    python index_transcripts.py --force              # reindex everything
+"""
+import os
+import argparse
+from dotenv import load_dotenv
+from pymongo import MongoClient
+from bson import ObjectId
+from transcript_store import TranscriptStore
+from search_index import TranscriptIndexer
+
+# Load environment variables
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recording-id", help="Only index this recording")
+    parser.add_argument("--force", action="store_true", help="Reindex already indexed recordings")
+    args = parser.parse_args()
+
+    mongodb_uri = os.getenv("MONGODB_URI", "mongodb://mongo:27017/speaker_db")
+    client = MongoClient(mongodb_uri, serverSelectionTimeoutMS=5000)
+    db = client['speaker_db']
+    store = TranscriptStore(db)
+    indexer = TranscriptIndexer(db)
+
+    query = {"status": "completed"}
+    if args.recording_id:
+        query = {"_id": ObjectId(args.recording_id)}
+    elif not args.force:
+        query["searchIndexedAt"] = {"$exists": False}
+
+    indexed = 0
+    for recording in db.recordings.find(query):
+        if not recording.get('startTime'):
+            print(f"  {recording['_id']}: recording has no startTime, skipping")
+            continue
+        segments = store.read(recording['_id'])
+        if segments is None:
+            segments = list(db.speakerSegments.find({"recordingId": recording['_id']}))
+        posting_count = indexer.index_recording(recording, segments)
+        print(f"  {recording['_id']}: {len(segments)} segments, {posting_count} postings")
+        indexed += 1
+
+    print(f"Indexed {indexed} recordings")
+
+
+if __name__ == "__main__":
+    main()
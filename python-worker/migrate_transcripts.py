@@ -0,0 +1,102 @@
+# migrate_transcripts.py
+"""Convert per-segment transcripts into compact per-recording transcripts.
+
+Usage:
+    python migrate_transcripts.py                      # all completed recordings
+    python migrate_transcripts.py --recording-id <id>  # a single recording
+    python migrate_transcripts.py --strip-segments     # also drop text from speakerSegments
+    python migrate_transcripts.py --dry-run
+"""
+import os
+import argparse
+from dotenv import load_dotenv
+from pymongo import MongoClient
+from bson import ObjectId
+from transcript_store import TranscriptStore
+
+# Load environment variables
+load_dotenv()
+
+
+def migrate_recording(db, store: TranscriptStore, recording, strip_segments: bool, dry_run: bool):
+    """Write the compact transcript of one recording from its speakerSegments"""
+    segments = list(
+        db.speakerSegments.find({"recordingId": recording['_id']}).sort("startTime", 1)
+    )
+    if not segments:
+        print(f"  {recording['_id']}: no segments, skipping")
+        return False
+    if not recording.get('startTime'):
+        print(f"  {recording['_id']}: recording has no startTime, skipping")
+        return False
+
+    if dry_run:
+        columns = TranscriptStore.build_columns(recording['startTime'], segments)
+        print(
+            f"  {recording['_id']}: would store {len(segments)} segments "
+            f"({len(columns['subStarts'])} transcription segments)"
+        )
+        return True
+
+    stored = store.write(recording, segments)
+    print(
+        f"  {recording['_id']}: stored {stored['segmentCount']} segments "
+        f"({stored['storage']}, {stored['sizeBytes']} bytes)"
+    )
+
+    if strip_segments:
+        db.speakerSegments.update_many(
+            {"recordingId": recording['_id']},
+            {"$set": {"transcription": "", "transcriptionSegments": []}}
+        )
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--recording-id", help="Only migrate this recording")
+    parser.add_argument(
+        "--strip-segments",
+        action="store_true",
+        help="Clear transcription fields on speakerSegments after migrating"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Rewrite recordings that already have a compact transcript"
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Report without writing")
+    args = parser.parse_args()
+
+    mongodb_uri = os.getenv("MONGODB_URI", "mongodb://mongo:27017/speaker_db")
+    client = MongoClient(mongodb_uri, serverSelectionTimeoutMS=5000)
+    db = client['speaker_db']
+    store = TranscriptStore(db)
+
+    query = {"status": "completed"}
+    if args.recording_id:
+        query = {"_id": ObjectId(args.recording_id)}
+
+    already_migrated = set()
+    if not args.force:
+        already_migrated = set(
+            doc['recordingId']
+            for doc in db[TranscriptStore.COLLECTION].find({}, {"recordingId": 1})
+        )
+
+    migrated = 0
+    skipped = 0
+    for recording in db.recordings.find(query):
+        if recording['_id'] in already_migrated:
+            skipped += 1
+            continue
+        if migrate_recording(db, store, recording, args.strip_segments, args.dry_run):
+            migrated += 1
+        else:
+            skipped += 1
+
+    print(f"Migrated {migrated} recordings, skipped {skipped}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ import os
 import sys
 import warnings
 import platform
+import subprocess
 from contextlib import redirect_stderr
 from io import StringIO
 from pathlib import Path
@@ -16,6 +17,9 @@ import numpy as np
 import re
 import soundfile as sf
 import librosa
+from transcript_store import TranscriptStore
+from search_index import TranscriptIndexer
+from waveform import WaveformSummarizer
 
 # Suppress librosa and soundfile warnings about duration estimation
 warnings.filterwarnings('ignore', message='.*Estimating duration from bitrate.*')
@@ -57,6 +61,10 @@ class AudioProcessor:
     DEFAULT_WHISPER_BEAM_SIZE = 1
     DEFAULT_WHISPER_BEST_OF = 1
     DEFAULT_WHISPER_VAD_FILTER = True
+    DEFAULT_TRANSCRIPT_STORAGE = "segments"
+    TRANSCRIPT_STORAGE_MODES = ("segments", "compact")
+    DEFAULT_TRANSCRIPT_INDEX_ENABLED = True
+    DEFAULT_WAVEFORM_SUMMARY_ENABLED = True
 
     @staticmethod
     def _get_env_int(var_name: str, default: int) -> int:
@@ -82,7 +90,14 @@ class AudioProcessor:
             return default
         return value.strip().lower() in ("1", "true", "yes", "on")
     
-    def __init__(self, mongodb_uri: str, hf_token: str, language: str = None):
+    def __init__(
+        self,
+        mongodb_uri: str,
+        hf_token: str,
+        language: str = None,
+        load_diarization: bool = True,
+        load_whisper: bool = True
+    ):
         print(f"Connecting to MongoDB at {mongodb_uri}...", flush=True)
         self.client = MongoClient(mongodb_uri, serverSelectionTimeoutMS=5000)
         self.db = self.client['speaker_db']
@@ -177,41 +192,75 @@ class AudioProcessor:
             f"vad_filter={self.whisper_transcribe_params['vad_filter']}",
             flush=True
         )
+        # Transcript storage: "segments" writes text into every speakerSegments
+        # document, "compact" writes one columnar transcript per recording
+        self.transcript_storage = os.getenv(
+            "TRANSCRIPT_STORAGE",
+            self.DEFAULT_TRANSCRIPT_STORAGE
+        ).strip().lower()
+        if self.transcript_storage not in self.TRANSCRIPT_STORAGE_MODES:
+            print(
+                f"Invalid TRANSCRIPT_STORAGE='{self.transcript_storage}', "
+                f"using default {self.DEFAULT_TRANSCRIPT_STORAGE}",
+                flush=True
+            )
+            self.transcript_storage = self.DEFAULT_TRANSCRIPT_STORAGE
+        self.transcript_store = TranscriptStore(self.db)
+        print(f"Transcript storage: {self.transcript_storage}", flush=True)
+        self.transcript_index_enabled = self._get_env_bool(
+            "TRANSCRIPT_INDEX_ENABLED",
+            self.DEFAULT_TRANSCRIPT_INDEX_ENABLED
+        )
+        self.transcript_indexer = TranscriptIndexer(self.db)
+        print(f"Transcript search index: {'enabled' if self.transcript_index_enabled else 'disabled'}", flush=True)
+        self.waveform_summary_enabled = self._get_env_bool(
+            "WAVEFORM_SUMMARY_ENABLED",
+            self.DEFAULT_WAVEFORM_SUMMARY_ENABLED
+        )
+        self.waveform_summarizer = WaveformSummarizer(
+            self.db,
+            os.getenv('STORAGE_PATH', '/app/storage')
+        )
+        print(f"Waveform summaries: {'enabled' if self.waveform_summary_enabled else 'disabled'}", flush=True)
         print(
             f"Hardware detection: {self.hardware_preferences['description']} "
             f"(env overrides applied: {'WHISPER_DEVICE' in os.environ or 'WHISPER_COMPUTE_TYPE' in os.environ})",
             flush=True
         )
         
-        # Initialize models
-        print("Loading diarization pipeline...", flush=True)
-        try:
-            # Load pipeline with authentication token
-            self.diarization_pipeline = Pipeline.from_pretrained(
-                "pyannote/speaker-diarization-3.1",
-                use_auth_token=hf_token
-            )
-        except Exception as e:
-            print(f"Failed to load diarization pipeline: {e}")
-            print("\nTroubleshooting steps:")
-            print("1. Verify your HuggingFace token is valid")
-            print("2. Accept model terms at:")
-            print("   - https://huggingface.co/pyannote/segmentation-3.0")
-            print("   - https://huggingface.co/pyannote/speaker-diarization-3.1")
-            print("   - https://huggingface.co/pyannote/embedding")
-            raise
+        # Initialize models (stage workers only load the models their stages need)
+        self.diarization_pipeline = None
+        self.whisper = None
+        if load_diarization:
+            print("Loading diarization pipeline...", flush=True)
+            try:
+                # Load pipeline with authentication token
+                self.diarization_pipeline = Pipeline.from_pretrained(
+                    "pyannote/speaker-diarization-3.1",
+                    use_auth_token=hf_token
+                )
+            except Exception as e:
+                print(f"Failed to load diarization pipeline: {e}")
+                print("\nTroubleshooting steps:")
+                print("1. Verify your HuggingFace token is valid")
+                print("2. Accept model terms at:")
+                print("   - https://huggingface.co/pyannote/segmentation-3.0")
+                print("   - https://huggingface.co/pyannote/speaker-diarization-3.1")
+                print("   - https://huggingface.co/pyannote/embedding")
+                raise
         
-        self.diarization_pipeline.to(torch.device("cpu"))
-        print("Diarization pipeline loaded", flush=True)
+            self.diarization_pipeline.to(torch.device("cpu"))
+            print("Diarization pipeline loaded", flush=True)
         
-        print("Loading Whisper model...", flush=True)
-        self.whisper = WhisperModel(
-            self.whisper_model_name,
-            device=self.whisper_device,
-            compute_type=self.whisper_compute_type,
-            cpu_threads=self.whisper_cpu_threads
-        )
-        print("Whisper model loaded", flush=True)
+        if load_whisper:
+            print("Loading Whisper model...", flush=True)
+            self.whisper = WhisperModel(
+                self.whisper_model_name,
+                device=self.whisper_device,
+                compute_type=self.whisper_compute_type,
+                cpu_threads=self.whisper_cpu_threads
+            )
+            print("Whisper model loaded", flush=True)
 
     def _detect_hardware_preferences(self):
         """Detect optimal Whisper device/compute type based on host hardware."""
@@ -327,8 +376,151 @@ class AudioProcessor:
             array_filters=[{"elem.name": step_name}]
         )
     
-    def process_recording(self, job_id: str):
-        """Main processing function"""
+    def prepare_recording(self, recording):
+        """Make sure the recording has a start time; returns it"""
+        # Extract start time from filename
+        recording_start = self.extract_start_time(recording['originalFilename'])
+        
+        # Update recording with start time if not already set
+        if 'startTime' not in recording or recording['startTime'] is None:
+            self.db.recordings.update_one(
+                {"_id": recording['_id']},
+                {"$set": {"startTime": recording_start}}
+            )
+            recording['startTime'] = recording_start
+        return recording_start
+    
+    def resolve_language(self, job, recording):
+        """Language for transcription
+        
+        Priority: job.language > recording.language > self.language (env var)
+        """
+        transcription_language = None
+        if job.get('language'):
+            transcription_language = job['language']
+        elif recording.get('language'):
+            transcription_language = recording['language']
+        else:
+            transcription_language = self.language  # Falls back to env var or None
+        
+        if transcription_language:
+            print(f"Transcription language: {transcription_language} (from {'job' if job.get('language') else 'recording' if recording.get('language') else 'environment'})", flush=True)
+        else:
+            print("Transcription language: auto-detect", flush=True)
+        return transcription_language
+    
+    def resolve_speaker_constraints(self, job, recording):
+        """Speaker count parameters for diarization
+        
+        Priority: job > recording > None (auto-detect)
+        """
+        min_speakers = None
+        max_speakers = None
+        
+        if job.get('minSpeakers') is not None:
+            min_speakers = job['minSpeakers']
+        elif recording.get('minSpeakers') is not None:
+            min_speakers = recording['minSpeakers']
+        
+        if job.get('maxSpeakers') is not None:
+            max_speakers = job['maxSpeakers']
+        elif recording.get('maxSpeakers') is not None:
+            max_speakers = recording['maxSpeakers']
+        
+        if min_speakers is not None or max_speakers is not None:
+            speaker_info = []
+            if min_speakers is not None:
+                speaker_info.append(f"min_speakers={min_speakers}")
+            if max_speakers is not None:
+                speaker_info.append(f"max_speakers={max_speakers}")
+            print(f"Diarization speaker constraints: {', '.join(speaker_info)}", flush=True)
+        else:
+            print("Diarization speaker count: auto-detect", flush=True)
+        return min_speakers, max_speakers
+    
+    def run_diarization(self, audio_input, min_speakers=None, max_speakers=None):
+        """Run the diarization pipeline on a file path or an in-memory waveform dict"""
+        print("Running diarization pipeline (this may take a while)...", flush=True)
+        # Suppress stderr output from soundfile/librosa during pipeline execution
+        stderr_buffer = StringIO()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            with redirect_stderr(stderr_buffer):
+                # Build diarization parameters
+                diarization_params = {}
+                if min_speakers is not None:
+                    diarization_params['min_speakers'] = min_speakers
+                if max_speakers is not None:
+                    diarization_params['max_speakers'] = max_speakers
+                
+                # Call diarization pipeline with parameters
+                if diarization_params:
+                    return self.diarization_pipeline(audio_input, **diarization_params)
+                return self.diarization_pipeline(audio_input)
+    
+    def finalize_transcript(self, recording, segments):
+        """Store the compact transcript and update the search index"""
+        if self.transcript_storage == "compact":
+            stored = self.transcript_store.write(recording, segments)
+            print(
+                f"✓ Stored compact transcript ({stored['storage']}, {stored['sizeBytes']} bytes)",
+                flush=True
+            )
+        else:
+            # A compact transcript from an earlier run would shadow the new segments
+            self.transcript_store.delete(recording['_id'])
+        if self.transcript_index_enabled:
+            try:
+                posting_count = self.transcript_indexer.index_recording(recording, segments)
+                print(f"✓ Indexed transcript ({posting_count} postings)", flush=True)
+            except Exception as e:
+                # Search is best effort, the transcript itself is already stored
+                print(f"Warning: failed to index transcript: {e}", flush=True)
+    
+    def complete_job(self, job_id: str, recording_id: ObjectId):
+        """Mark a job and its recording as completed"""
+        self.update_job_progress(job_id, 100, "completed", recording_id)
+        self.db.processingJobs.update_one(
+            {"_id": ObjectId(job_id)},
+            {"$set": {"completedAt": datetime.utcnow()}}
+        )
+        self.db.recordings.update_one(
+            {"_id": recording_id},
+            {"$set": {"status": "completed", "progress": 100}}
+        )
+    
+    def fail_job(self, job_id: str, error: Exception):
+        """Mark a job and its recording as failed"""
+        # Try to get recording_id if available
+        recording_id = None
+        try:
+            job = self.db.processingJobs.find_one({"_id": ObjectId(job_id)})
+            if job and 'recordingId' in job:
+                recording_id = job['recordingId']
+        except:
+            pass
+        
+        self.update_job_progress(job_id, 0, "failed", recording_id)
+        self.db.processingJobs.update_one(
+            {"_id": ObjectId(job_id)},
+            {"$set": {
+                "errorMessage": str(error),
+                "completedAt": datetime.utcnow()
+            }}
+        )
+        if recording_id:
+            self.db.recordings.update_one(
+                {"_id": recording_id},
+                {"$set": {"status": "failed", "errorMessage": str(error), "progress": 0}}
+            )
+    
+    def process_recording(self, job_id: str) -> bool:
+        """Main processing function
+        
+        Returns:
+            False if the job or its recording no longer exists, True once processed.
+        """
+        decoded_path = None
         try:
             # Get job details
             print(f"\n{'='*60}", flush=True)
@@ -338,68 +530,27 @@ class AudioProcessor:
             job = self.db.processingJobs.find_one({"_id": ObjectId(job_id)})
             if not job:
                 print(f"Job {job_id} not found", flush=True)
-                return
+                return False
             
             recording = self.db.recordings.find_one(
                 {"_id": ObjectId(job['recordingId'])}
             )
             if not recording:
                 print(f"Recording not found for job {job_id}", flush=True)
-                return
+                return False
             
-            # Extract start time from filename
-            recording_start = self.extract_start_time(recording['originalFilename'])
-            
-            # Update recording with start time if not already set
-            if 'startTime' not in recording or recording['startTime'] is None:
-                self.db.recordings.update_one(
-                    {"_id": recording['_id']},
-                    {"$set": {"startTime": recording_start}}
-                )
-                recording['startTime'] = recording_start
+            recording_start = self.prepare_recording(recording)
             
             # Store recording_id for progress updates
             recording_id = recording['_id']
             
-            # Get language from job, recording, or fall back to instance default (from env var)
-            # Priority: job.language > recording.language > self.language (env var)
-            transcription_language = None
-            if job.get('language'):
-                transcription_language = job['language']
-            elif recording.get('language'):
-                transcription_language = recording['language']
-            else:
-                transcription_language = self.language  # Falls back to env var or None
+            # Admission control routes recordings too large for the memory budget here
+            low_memory = job.get('executionMode') == 'low_memory'
+            if low_memory:
+                print("Execution mode: low-memory", flush=True)
             
-            if transcription_language:
-                print(f"Transcription language: {transcription_language} (from {'job' if job.get('language') else 'recording' if recording.get('language') else 'environment'})", flush=True)
-            else:
-                print("Transcription language: auto-detect", flush=True)
-            
-            # Get speaker count parameters from job, recording, or None
-            # Priority: job > recording > None (auto-detect)
-            min_speakers = None
-            max_speakers = None
-            
-            if job.get('minSpeakers') is not None:
-                min_speakers = job['minSpeakers']
-            elif recording.get('minSpeakers') is not None:
-                min_speakers = recording['minSpeakers']
-            
-            if job.get('maxSpeakers') is not None:
-                max_speakers = job['maxSpeakers']
-            elif recording.get('maxSpeakers') is not None:
-                max_speakers = recording['maxSpeakers']
-            
-            if min_speakers is not None or max_speakers is not None:
-                speaker_info = []
-                if min_speakers is not None:
-                    speaker_info.append(f"min_speakers={min_speakers}")
-                if max_speakers is not None:
-                    speaker_info.append(f"max_speakers={max_speakers}")
-                print(f"Diarization speaker constraints: {', '.join(speaker_info)}", flush=True)
-            else:
-                print("Diarization speaker count: auto-detect", flush=True)
+            transcription_language = self.resolve_language(job, recording)
+            min_speakers, max_speakers = self.resolve_speaker_constraints(job, recording)
             
             # Update status
             self.update_job_progress(job_id, 0, "running", recording_id)
@@ -415,24 +566,18 @@ class AudioProcessor:
             self.update_job_step(job_id, "diarization", "running", 0)
             self.update_job_progress(job_id, 5, "running", recording_id)  # Show initial progress
             
-            print("Running diarization pipeline (this may take a while)...", flush=True)
-            # Suppress stderr output from soundfile/librosa during pipeline execution
-            stderr_buffer = StringIO()
-            with warnings.catch_warnings():
-                warnings.simplefilter("ignore")
-                with redirect_stderr(stderr_buffer):
-                    # Build diarization parameters
-                    diarization_params = {}
-                    if min_speakers is not None:
-                        diarization_params['min_speakers'] = min_speakers
-                    if max_speakers is not None:
-                        diarization_params['max_speakers'] = max_speakers
-                    
-                    # Call diarization pipeline with parameters
-                    if diarization_params:
-                        diarization = self.diarization_pipeline(recording['filePath'], **diarization_params)
-                    else:
-                        diarization = self.diarization_pipeline(recording['filePath'])
+            if low_memory:
+                # Decode once to 16 kHz mono on disk: pyannote then reads that file
+                # instead of decoding the original at its native rate and channel
+                # count, and later steps slice it instead of holding the waveform
+                decoded_path = self.decoded_audio_path(recording['_id'])
+                self.decode_to_wav(recording['filePath'], decoded_path)
+            
+            diarization = self.run_diarization(
+                decoded_path or recording['filePath'],
+                min_speakers,
+                max_speakers
+            )
             
             # Count segments
             segment_list = list(diarization.itertracks())
@@ -457,7 +602,12 @@ class AudioProcessor:
             # Step 3: Extract segments (50-60%)
             print("=" * 60, flush=True)
             print("STEP 3: Extracting audio segments...", flush=True)
-            self.extract_audio_segments(recording, segments)
+            self.extract_audio_segments(
+                recording,
+                segments,
+                low_memory=low_memory,
+                audio_path=decoded_path
+            )
             print(f"✓ Extracted {len(segments)} audio segment files", flush=True)
             self.update_job_progress(job_id, 60, "running", recording_id)
             
@@ -475,18 +625,11 @@ class AudioProcessor:
                 language=transcription_language
             )
             print("✓ Transcription completed for all segments", flush=True)
+            self.finalize_transcript(recording, segments)
             self.update_job_step(job_id, "transcription", "completed", 100)
             
             # Update final status
-            self.update_job_progress(job_id, 100, "completed", recording_id)
-            self.db.processingJobs.update_one(
-                {"_id": ObjectId(job_id)},
-                {"$set": {"completedAt": datetime.utcnow()}}
-            )
-            self.db.recordings.update_one(
-                {"_id": recording['_id']},
-                {"$set": {"status": "completed", "progress": 100}}
-            )
+            self.complete_job(job_id, recording_id)
             
             print("=" * 60, flush=True)
             print(f"✓✓✓ JOB COMPLETED SUCCESSFULLY ✓✓✓", flush=True)
@@ -494,35 +637,18 @@ class AudioProcessor:
             print(f"Recording ID: {recording['_id']}", flush=True)
             print(f"Total segments processed: {len(segments)}", flush=True)
             print("=" * 60, flush=True)
+            return True
             
         except Exception as e:
             print(f"Error processing job {job_id}: {str(e)}", flush=True)
             import traceback
             traceback.print_exc()
             
-            # Try to get recording_id if available
-            recording_id = None
-            try:
-                job = self.db.processingJobs.find_one({"_id": ObjectId(job_id)})
-                if job and 'recordingId' in job:
-                    recording_id = job['recordingId']
-            except:
-                pass
-            
-            self.update_job_progress(job_id, 0, "failed", recording_id)
-            self.db.processingJobs.update_one(
-                {"_id": ObjectId(job_id)},
-                {"$set": {
-                    "errorMessage": str(e),
-                    "completedAt": datetime.utcnow()
-                }}
-            )
-            if recording_id:
-                self.db.recordings.update_one(
-                    {"_id": recording_id},
-                    {"$set": {"status": "failed", "errorMessage": str(e), "progress": 0}}
-                )
+            self.fail_job(job_id, e)
             raise
+        finally:
+            if decoded_path and os.path.exists(decoded_path):
+                os.remove(decoded_path)
     
     def transcribe_segments(
         self, 
@@ -537,6 +663,7 @@ class AudioProcessor:
         """Transcribe all segments with progress updates
         
         Args:
+            job_id: Job to report progress on, or None to skip progress updates.
             language: Language code to use for transcription. If None, uses self.language (from env var) or auto-detects.
         """
         total_segments = len(segments)
@@ -576,47 +703,69 @@ class AudioProcessor:
                     })
                     full_text.append(seg.text.strip())
                 
-                # Update segment in MongoDB
-                self.db.speakerSegments.update_one(
-                    {"_id": segment['_id']},
-                    {
-                        "$set": {
-                            "transcription": " ".join(full_text),
-                            "transcriptionSegments": transcription_segments
+                segment['transcription'] = " ".join(full_text)
+                segment['transcriptionSegments'] = transcription_segments
+                
+                # Update segment in MongoDB (compact storage writes once after the loop)
+                if self.transcript_storage != "compact":
+                    self.db.speakerSegments.update_one(
+                        {"_id": segment['_id']},
+                        {
+                            "$set": {
+                                "transcription": segment['transcription'],
+                                "transcriptionSegments": transcription_segments
+                            }
                         }
-                    }
-                )
+                    )
                 
                 # Update progress
                 current_progress = start_progress + int(
                     (idx + 1) / total_segments * progress_range
                 )
-                self.update_job_progress(job_id, current_progress, "running", recording_id)
+                if job_id:
+                    self.update_job_progress(job_id, current_progress, "running", recording_id)
             except Exception as e:
                 print(f"Error transcribing segment {segment['_id']}: {str(e)}")
                 continue
     
-    def identify_speakers(self, recording, diarization, recording_start):
-        """Identify speakers and create segment documents"""
+    @staticmethod
+    def diarization_turns(diarization):
+        """Flatten a pyannote annotation into (start, end, speakerLabel) tuples"""
+        return [
+            (turn.start, turn.end, speaker_label)
+            for turn, _, speaker_label in diarization.itertracks(yield_label=True)
+        ]
+    
+    def identify_speakers(self, recording, diarization, recording_start, job_id=None):
+        """Identify speakers and create segment documents
+        
+        Args:
+            diarization: pyannote annotation, or a list of (start, end, speakerLabel) turns
+            job_id: Job creating the segments, stored so a retried stage task can
+                remove the segments of an interrupted attempt.
+        """
         segments = []
+        turns = diarization if isinstance(diarization, list) else self.diarization_turns(diarization)
         
-        for turn, _, speaker_label in diarization.itertracks(yield_label=True):
+        for turn_start, turn_end, speaker_label in turns:
             # Calculate absolute timestamps
-            start_time = recording_start + timedelta(seconds=turn.start)
-            end_time = recording_start + timedelta(seconds=turn.end)
+            start_time = recording_start + timedelta(seconds=turn_start)
+            end_time = recording_start + timedelta(seconds=turn_end)
             
             segment = {
                 "recordingId": recording['_id'],
                 "speakerLabel": speaker_label,
                 "startTime": start_time,
                 "endTime": end_time,
-                "durationSeconds": turn.end - turn.start,
+                "durationSeconds": turn_end - turn_start,
                 "confidenceScore": 0.0,  # Will be updated during identification
                 "segmentAudioPath": "",  # Will be set after extraction
                 "transcription": "",
                 "transcriptionSegments": [],
                 "createdAt": datetime.utcnow()
             }
+            if job_id is not None:
+                segment["processingJobId"] = job_id
             
             # Insert into MongoDB
             result = self.db.speakerSegments.insert_one(segment)
@@ -625,14 +774,74 @@ class AudioProcessor:
         
         return segments
     
-    def extract_audio_segments(self, recording, segments):
-        """Extract audio files for each segment"""
-        # Load full audio with warnings suppressed
+    def decoded_audio_path(self, recording_id) -> str:
+        decoded_dir = os.path.join(os.getenv('STORAGE_PATH', '/app/storage'), 'decoded')
+        os.makedirs(decoded_dir, exist_ok=True)
+        return os.path.join(decoded_dir, f"{recording_id}_16k.wav")
+    
+    def decode_to_wav(self, path: str, wav_path: str, sr: int = 16000):
+        """Stream-decode an audio file to a 16-bit mono WAV at `sr` with FFmpeg
+        
+        The waveform is never held in memory, so this works for recordings of
+        any length.
+        """
+        subprocess.run(
+            [
+                "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-y",
+                "-i", path, "-vn", "-ac", "1", "-ar", str(sr), "-c:a", "pcm_s16le",
+                wav_path
+            ],
+            check=True,
+            stdout=subprocess.DEVNULL
+        )
+        return wav_path
+    
+    def extract_audio_segments(
+        self,
+        recording,
+        segments,
+        low_memory: bool = False,
+        audio_path: str = None
+    ):
+        """Extract audio files for each segment
+        
+        Args:
+            low_memory: Read each segment and the waveform summary from `audio_path`
+                instead of holding the whole recording in memory.
+            audio_path: Already decoded 16 kHz mono WAV to read instead of decoding
+                the original recording (see decode_to_wav). Required in low-memory mode.
+        """
+        sr = 16000
+        audio = None
         stderr_buffer = StringIO()
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore")
-            with redirect_stderr(stderr_buffer):
-                audio, sr = librosa.load(recording['filePath'], sr=16000)
+        if low_memory:
+            if not audio_path:
+                raise ValueError("Low-memory extraction needs a decoded audio file")
+            print("Low-memory mode: reading segments from the decoded file", flush=True)
+            sr = sf.info(audio_path).samplerate
+        elif audio_path:
+            audio, sr = sf.read(audio_path, dtype='float32')
+        else:
+            # Load full audio with warnings suppressed
+            with warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                with redirect_stderr(stderr_buffer):
+                    audio, sr = librosa.load(recording['filePath'], sr=sr)
+        
+        # Summaries reuse the decoded waveform instead of decoding the file again
+        if self.waveform_summary_enabled:
+            try:
+                if audio is None:
+                    waveform = self.waveform_summarizer.write_from_file(recording, audio_path, segments)
+                else:
+                    waveform = self.waveform_summarizer.write(recording, audio, sr, segments)
+                print(
+                    f"✓ Wrote waveform summary ({len(waveform['levels'])} levels, "
+                    f"{len(waveform['activity']['speakers'])} speaker lanes)",
+                    flush=True
+                )
+            except Exception as e:
+                print(f"Warning: failed to write waveform summary: {e}", flush=True)
         
         storage_path = os.getenv('STORAGE_PATH', '/app/storage')
         segments_dir = os.path.join(storage_path, 'segments')
@@ -653,16 +862,24 @@ class AudioProcessor:
                     segment_start = segment['startTime']
                 
                 offset_seconds = (segment_start - recording_start).total_seconds()
-                
-                start_sample = int(offset_seconds * sr)
+                start_sample = max(0, int(offset_seconds * sr))
                 end_sample = int(start_sample + segment['durationSeconds'] * sr)
                 
-                # Ensure we don't go out of bounds
-                start_sample = max(0, min(start_sample, len(audio)))
-                end_sample = max(start_sample, min(end_sample, len(audio)))
-                
-                # Extract segment
-                segment_audio = audio[start_sample:end_sample]
+                if audio is None:
+                    # Seek into the decoded WAV, only this segment is read
+                    segment_audio, _ = sf.read(
+                        audio_path,
+                        start=start_sample,
+                        stop=max(start_sample, end_sample),
+                        dtype='float32'
+                    )
+                else:
+                    # Ensure we don't go out of bounds
+                    start_sample = min(start_sample, len(audio))
+                    end_sample = max(start_sample, min(end_sample, len(audio)))
+                    
+                    # Extract segment
+                    segment_audio = audio[start_sample:end_sample]
                 
                 # Save segment
                 segment_path = os.path.join(
@@ -0,0 +1,122 @@
+# search_index.py
+import unicodedata
+from datetime import datetime
+from pymongo import InsertOne
+
+# Must match the tokenizer in nextjs-app/lib/search.ts: NFC text, tokens are runs
+# of letters, marks, numbers and "_" ([\p{L}\p{M}\p{N}_]+), lowercased
+TOKEN_CATEGORIES = ("L", "M", "N")
+MIN_TOKEN_LENGTH = 2
+STOP_WORDS = frozenset((
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "if", "in",
+    "is", "it", "of", "on", "or", "so", "that", "the", "this", "to", "was",
+    "we", "with", "you", "uh", "um"
+))
+
+
+def _is_token_char(char: str) -> bool:
+    return char == "_" or unicodedata.category(char)[0] in TOKEN_CATEGORIES
+
+
+def iter_token_spans(text: str):
+    """Yield (token, start, end) for each indexable token of NFC-normalized text"""
+    start = None
+    for idx, char in enumerate(text):
+        if _is_token_char(char):
+            if start is None:
+                start = idx
+            continue
+        if start is not None:
+            yield from _accept_token(text, start, idx)
+            start = None
+    if start is not None:
+        yield from _accept_token(text, start, len(text))
+
+
+def _accept_token(text: str, start: int, end: int):
+    token = text[start:end].lower()
+    if len(token) >= MIN_TOKEN_LENGTH and token not in STOP_WORDS:
+        yield token, start, end
+
+
+def normalize_text(text: str) -> str:
+    return unicodedata.normalize("NFC", text or "")
+
+
+def tokenize(text: str):
+    """Lowercase word tokens with short tokens and stop words removed"""
+    return [token for token, _, _ in iter_token_spans(normalize_text(text))]
+
+
+class TranscriptIndexer:
+    """Inverted index over transcripts stored in `transcriptPostings`.
+
+    One posting document per (recording, speaker, token) holds parallel arrays of
+    the segments containing the token and their offsets from the recording start.
+    Documents carry meetingId and recordingStart so speaker/meeting/time filters
+    are answered from the index without touching `speakerSegments`.
+    """
+    COLLECTION = "transcriptPostings"
+    BATCH_SIZE = 1000
+
+    def __init__(self, db):
+        self.db = db
+
+    @staticmethod
+    def build_postings(recording, segments):
+        """Group tokens of each segment into posting documents"""
+        recording_start = recording['startTime']
+        postings = {}
+        for segment in segments:
+            tokens = tokenize(segment.get('transcription', ''))
+            if not tokens:
+                continue
+            offset = round((segment['startTime'] - recording_start).total_seconds(), 3)
+            label = segment.get('speakerLabel', '')
+            identified_speaker_id = segment.get('identifiedSpeakerId')
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                key = (label, identified_speaker_id, token)
+                if key not in postings:
+                    postings[key] = {
+                        "token": token,
+                        "recordingId": recording['_id'],
+                        "meetingId": recording.get('meetingId'),
+                        "recordingStart": recording_start,
+                        "speakerLabel": label,
+                        "identifiedSpeakerId": identified_speaker_id,
+                        "segmentIds": [],
+                        "offsets": [],
+                        "termFrequencies": []
+                    }
+                posting = postings[key]
+                posting["segmentIds"].append(segment['_id'])
+                posting["offsets"].append(offset)
+                posting["termFrequencies"].append(count)
+        return list(postings.values())
+
+    def index_recording(self, recording, segments) -> int:
+        """Replace the postings of a recording; returns the number of posting documents"""
+        self.delete_recording(recording['_id'])
+        postings = self.build_postings(recording, segments)
+        now = datetime.utcnow()
+        requests = []
+        for posting in postings:
+            posting["indexedAt"] = now
+            requests.append(InsertOne(posting))
+            if len(requests) >= self.BATCH_SIZE:
+                self.db[self.COLLECTION].bulk_write(requests, ordered=False)
+                requests = []
+        if requests:
+            self.db[self.COLLECTION].bulk_write(requests, ordered=False)
+
+        self.db.recordings.update_one(
+            {"_id": recording['_id']},
+            {"$set": {"searchIndexedAt": now}}
+        )
+        return len(postings)
+
+    def delete_recording(self, recording_id):
+        self.db[self.COLLECTION].delete_many({"recordingId": recording_id})
@@ -0,0 +1,368 @@
+# stages.py
+import os
+import json
+import shutil
+from datetime import datetime
+import soundfile as sf
+from pymongo import ReturnDocument
+from admission import get_env_int
+
+STAGES = ("diarize", "identify", "transcribe")
+
+
+class StagePipeline:
+    """Run a processing job as independently claimable stage tasks.
+
+    A queued full job is expanded into stage tasks stored in `processingJobs`
+    (jobType "stage", linked by parentJobId):
+
+    - diarize: stream-decode the recording once to a 16 kHz WAV, run pyannote
+      on it, hand the WAV and the speaker turns to the next stage through the
+      shared storage volume
+    - identify: create segment documents, extract segment audio (sliced from
+      the WAV in low-memory mode), split the segments into transcription
+      shards of about TRANSCRIBE_SHARD_SECONDS
+    - transcribe: transcribe one shard; the worker finishing the last shard
+      stores the transcript and completes the parent job
+
+    The parent job keeps its steps and progress so the UI is unchanged. Workers
+    started with `--stages` only claim tasks for their stages, so several nodes
+    can transcribe shards of one long recording in parallel.
+
+    Tasks of a worker that died are requeued by admission control once their
+    heartbeat is stale, so every stage can be rerun: hand-off files are
+    overwritten, an interrupted identify removes its segments first, and shards
+    are counted as a set of finished indexes.
+    """
+    DEFAULT_SHARD_SECONDS = 600
+    # Requeues after a lost worker before the task and its job fail
+    MAX_RETRIES = 2
+    SAMPLE_RATE = 16000
+
+    def __init__(self, processor):
+        self.processor = processor
+        self.db = processor.db
+        self.storage_path = os.getenv('STORAGE_PATH', '/app/storage')
+        self.shard_seconds = get_env_int("TRANSCRIBE_SHARD_SECONDS", self.DEFAULT_SHARD_SECONDS)
+
+    def stage_dir(self, parent_id) -> str:
+        return os.path.join(self.storage_path, 'stages', str(parent_id))
+
+    def build_task(self, parent, stage: str, **fields):
+        task = {
+            "jobType": "stage",
+            "stage": stage,
+            "parentJobId": parent['_id'],
+            "recordingId": parent['recordingId'],
+            "status": "queued",
+            "progress": 0,
+            "errorMessage": None,
+            # Inherit the parent's creation time so older recordings keep priority
+            "createdAt": parent.get('createdAt') or datetime.utcnow()
+        }
+        task.update(fields)
+        return task
+
+    def create_task(self, parent, stage: str, **fields):
+        task = self.build_task(parent, stage, **fields)
+        task['_id'] = self.db.processingJobs.insert_one(task).inserted_id
+        return task
+
+    def expand_next_job(self, admission):
+        """Claim the oldest queued full job and queue its diarize task
+        
+        Only called by diarize workers, and only expands a job when no diarize
+        task is already waiting and its diarize task would be admitted here, so
+        queued recordings stay queued until a worker can start them.
+        """
+        if self.db.processingJobs.find_one(
+            {"jobType": "stage", "stage": "diarize", "status": "queued"},
+            {"_id": 1}
+        ):
+            return None
+        candidate = self.db.processingJobs.find_one(
+            {"status": "queued", "jobType": {"$ne": "stage"}},
+            sort=[("createdAt", 1)]  # FIFO
+        )
+        if not candidate or not admission.would_admit(
+            {"jobType": "stage", "stage": "diarize", "recordingId": candidate['recordingId']}
+        ):
+            return None
+        parent = self.db.processingJobs.find_one_and_update(
+            {"_id": candidate['_id'], "status": "queued"},
+            {"$set": {
+                "status": "running",
+                "startedAt": datetime.utcnow(),
+                "pipeline": "staged"
+            }},
+            return_document=ReturnDocument.AFTER
+        )
+        if not parent:
+            # Expanded by another worker in the meantime
+            return None
+        self.processor.update_job_progress(str(parent['_id']), 0, "running", parent['recordingId'])
+        self.create_task(parent, "diarize")
+        print(f"Job {parent['_id']} split into stage tasks", flush=True)
+        return parent
+
+    def run_task(self, task) -> bool:
+        """Run one claimed stage task, failing the parent job on error
+        
+        Returns:
+            False if the parent job failed or no longer exists, True once run.
+        """
+        parent = self.db.processingJobs.find_one({"_id": task['parentJobId']})
+        if not parent or parent.get('status') == 'failed':
+            self.db.processingJobs.update_one(
+                {"_id": task['_id']},
+                {"$set": {
+                    "status": "failed",
+                    "errorMessage": "Parent job failed or was removed",
+                    "completedAt": datetime.utcnow()
+                }}
+            )
+            return False
+        if parent.get('status') == 'completed':
+            # Retried task whose results were already merged
+            self.db.processingJobs.update_one(
+                {"_id": task['_id']},
+                {"$set": {"status": "completed", "progress": 100, "completedAt": datetime.utcnow()}}
+            )
+            return False
+        recording = self.db.recordings.find_one({"_id": parent['recordingId']})
+
+        print(f"\n{'='*60}", flush=True)
+        print(
+            f"Stage {task['stage']} for job {parent['_id']}"
+            + (f" (shard {task['shardIndex'] + 1}/{task['shardCount']})" if task['stage'] == 'transcribe' else ""),
+            flush=True
+        )
+        print(f"{'='*60}\n", flush=True)
+
+        handlers = {
+            "diarize": self.run_diarize,
+            "identify": self.run_identify,
+            "transcribe": self.run_transcribe
+        }
+        try:
+            if not recording:
+                raise ValueError(f"Recording not found for job {parent['_id']}")
+            if task.get('retries', 0) >= self.MAX_RETRIES:
+                raise RuntimeError(
+                    f"Stage {task['stage']} was interrupted {task['retries']} times, giving up"
+                )
+            handlers[task['stage']](task, parent, recording)
+            self.db.processingJobs.update_one(
+                {"_id": task['_id']},
+                {"$set": {"status": "completed", "progress": 100, "completedAt": datetime.utcnow()}}
+            )
+            return True
+        except Exception as e:
+            print(f"Error in stage {task['stage']} of job {parent['_id']}: {str(e)}", flush=True)
+            self.db.processingJobs.update_one(
+                {"_id": task['_id']},
+                {"$set": {"status": "failed", "errorMessage": str(e), "completedAt": datetime.utcnow()}}
+            )
+            # Tasks still queued for this job would only redo work for a failed job
+            self.db.processingJobs.update_many(
+                {"parentJobId": parent['_id'], "status": "queued"},
+                {"$set": {"status": "failed", "errorMessage": "Cancelled after a failed stage"}}
+            )
+            self.processor.fail_job(str(parent['_id']), e)
+            shutil.rmtree(self.stage_dir(parent['_id']), ignore_errors=True)
+            raise
+
+    def run_diarize(self, task, parent, recording):
+        parent_id = str(parent['_id'])
+        self.processor.prepare_recording(recording)
+        min_speakers, max_speakers = self.processor.resolve_speaker_constraints(parent, recording)
+
+        self.processor.update_job_step(parent_id, "diarization", "running", 0)
+        self.processor.update_job_progress(parent_id, 5, "running", recording['_id'])
+
+        # Decode once without holding the waveform; pyannote and later stages
+        # read the decoded WAV from shared storage
+        stage_dir = self.stage_dir(parent['_id'])
+        os.makedirs(stage_dir, exist_ok=True)
+        audio_path = os.path.join(stage_dir, 'audio_16k.wav')
+        self.processor.decode_to_wav(recording['filePath'], audio_path, self.SAMPLE_RATE)
+        duration_seconds = sf.info(audio_path).duration
+
+        diarization = self.processor.run_diarization(audio_path, min_speakers, max_speakers)
+        turns = self.processor.diarization_turns(diarization)
+        with open(os.path.join(stage_dir, 'diarization.json'), 'w') as f:
+            json.dump(turns, f)
+
+        print(f"✓ Diarization completed! Found {len(turns)} speaker segments", flush=True)
+        self.db.recordings.update_one(
+            {"_id": recording['_id']},
+            {"$set": {"durationSeconds": duration_seconds}}
+        )
+        self.processor.update_job_step(parent_id, "diarization", "completed", 100)
+        self.processor.update_job_progress(parent_id, 30, "running", recording['_id'])
+        # A retried diarize may find the identify task of an interrupted attempt
+        if not self.db.processingJobs.find_one({"parentJobId": parent['_id'], "stage": "identify"}):
+            self.create_task(parent, "identify", durationSeconds=duration_seconds)
+
+    def split_shards(self, segments):
+        """Group consecutive segments into shards of about shard_seconds of audio"""
+        shards = []
+        current = []
+        current_seconds = 0.0
+        for segment in segments:
+            current.append(segment)
+            current_seconds += segment['durationSeconds']
+            if current_seconds >= self.shard_seconds:
+                shards.append((current, current_seconds))
+                current = []
+                current_seconds = 0.0
+        if current:
+            shards.append((current, current_seconds))
+        return shards
+
+    def remove_partial_segments(self, parent_id):
+        """Remove segments and segment audio created by an interrupted identify"""
+        partial = list(self.db.speakerSegments.find(
+            {"processingJobId": parent_id},
+            {"segmentAudioPath": 1}
+        ))
+        for segment in partial:
+            if segment.get('segmentAudioPath') and os.path.exists(segment['segmentAudioPath']):
+                os.remove(segment['segmentAudioPath'])
+        if partial:
+            self.db.speakerSegments.delete_many({"processingJobId": parent_id})
+            print(f"Removed {len(partial)} segments of an interrupted attempt", flush=True)
+
+    def run_identify(self, task, parent, recording):
+        parent_id = str(parent['_id'])
+        if self.db.processingJobs.find_one({"parentJobId": parent['_id'], "stage": "transcribe"}):
+            # An interrupted attempt already queued the shards
+            return
+        self.remove_partial_segments(parent['_id'])
+        stage_dir = self.stage_dir(parent['_id'])
+        with open(os.path.join(stage_dir, 'diarization.json')) as f:
+            turns = [tuple(turn) for turn in json.load(f)]
+
+        self.processor.update_job_step(parent_id, "identification", "running", 0)
+        segments = self.processor.identify_speakers(
+            recording,
+            turns,
+            recording['startTime'],
+            job_id=parent['_id']
+        )
+        print(f"✓ Created {len(segments)} segment documents in database", flush=True)
+        self.processor.extract_audio_segments(
+            recording,
+            segments,
+            low_memory=task.get('executionMode') == 'identify_low_memory',
+            audio_path=os.path.join(stage_dir, 'audio_16k.wav')
+        )
+        print(f"✓ Extracted {len(segments)} audio segment files", flush=True)
+        self.processor.update_job_step(parent_id, "identification", "completed", 100)
+        self.processor.update_job_progress(parent_id, 60, "running", recording['_id'])
+
+        shards = self.split_shards(segments)
+        # Set the shard count before any shard can finish
+        self.db.processingJobs.update_one(
+            {"_id": parent['_id']},
+            {"$set": {"transcriptionShards": len(shards), "shardsDone": []}}
+        )
+        self.processor.update_job_step(parent_id, "transcription", "running", 0)
+        if not shards:
+            self.finalize(parent, recording)
+            return
+        # One insert, so a retried identify sees either all shards or none
+        self.db.processingJobs.insert_many([
+            self.build_task(
+                parent,
+                "transcribe",
+                shardIndex=shard_index,
+                shardCount=len(shards),
+                segmentIds=[segment['_id'] for segment in shard_segments],
+                durationSeconds=shard_seconds
+            )
+            for shard_index, (shard_segments, shard_seconds) in enumerate(shards)
+        ])
+        print(f"✓ Queued {len(shards)} transcription shards", flush=True)
+
+    def shard_path(self, parent_id, shard_index: int) -> str:
+        return os.path.join(self.stage_dir(parent_id), 'transcripts', f"shard_{shard_index:04d}.json")
+
+    def run_transcribe(self, task, parent, recording):
+        parent_id = str(parent['_id'])
+        segments = list(
+            self.db.speakerSegments.find({"_id": {"$in": task['segmentIds']}}).sort("startTime", 1)
+        )
+        language = self.processor.resolve_language(parent, recording)
+        self.processor.transcribe_segments(recording, segments, None, language=language)
+
+        # Results go through shared storage so compact transcripts work across nodes
+        shard_path = self.shard_path(parent['_id'], task['shardIndex'])
+        os.makedirs(os.path.dirname(shard_path), exist_ok=True)
+        with open(shard_path, 'w') as f:
+            json.dump({
+                str(segment['_id']): {
+                    "transcription": segment.get('transcription', ''),
+                    "transcriptionSegments": segment.get('transcriptionSegments', [])
+                }
+                for segment in segments
+            }, f)
+        print(f"✓ Transcribed {len(segments)} segments", flush=True)
+
+        # A set of finished shards, so a retried shard is never counted twice.
+        # Only a running job counts: another shard may have failed it meanwhile
+        before = self.db.processingJobs.find_one_and_update(
+            {"_id": parent['_id'], "status": "running"},
+            {"$addToSet": {"shardsDone": task['shardIndex']}},
+            return_document=ReturnDocument.BEFORE
+        )
+        if not before:
+            print(f"Job {parent_id} is no longer running, discarding shard results", flush=True)
+            # The failure already removed the stage directory; drop what this shard wrote
+            shutil.rmtree(self.stage_dir(parent['_id']), ignore_errors=True)
+            return
+        done = set(before.get('shardsDone') or [])
+        newly_done = task['shardIndex'] not in done
+        done.add(task['shardIndex'])
+        total = before.get('transcriptionShards') or 1
+        if len(done) < total:
+            progress = 60 + int(len(done) / total * 40)
+            self.processor.update_job_progress(parent_id, progress, "running", recording['_id'])
+            self.processor.update_job_step(parent_id, "transcription", "running", int(len(done) / total * 100))
+            return
+        # The last shard finalizes; a retry finalizes again only if its earlier
+        # attempt counted the last shard and then died
+        if newly_done or task.get('retries'):
+            self.finalize(before, recording)
+
+    def finalize(self, parent, recording):
+        """Merge shard results, store the transcript and complete the parent job"""
+        parent_id = str(parent['_id'])
+        results = {}
+        segment_ids = []
+        for task in self.db.processingJobs.find(
+            {"parentJobId": parent['_id'], "stage": "transcribe"},
+            {"shardIndex": 1, "segmentIds": 1}
+        ):
+            segment_ids.extend(task['segmentIds'])
+            shard_path = self.shard_path(parent['_id'], task['shardIndex'])
+            if os.path.exists(shard_path):
+                with open(shard_path) as f:
+                    results.update(json.load(f))
+
+        segments = list(
+            self.db.speakerSegments.find({"_id": {"$in": segment_ids}}).sort("startTime", 1)
+        )
+        for segment in segments:
+            segment.update(results.get(str(segment['_id']), {}))
+
+        self.processor.finalize_transcript(recording, segments)
+        self.processor.update_job_step(parent_id, "transcription", "completed", 100)
+        self.processor.complete_job(parent_id, recording['_id'])
+        shutil.rmtree(self.stage_dir(parent['_id']), ignore_errors=True)
+
+        print("=" * 60, flush=True)
+        print(f"✓✓✓ JOB COMPLETED SUCCESSFULLY ✓✓✓", flush=True)
+        print(f"Job ID: {parent_id}", flush=True)
+        print(f"Total segments processed: {len(segments)}", flush=True)
+        print("=" * 60, flush=True)
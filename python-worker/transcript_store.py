@@ -0,0 +1,233 @@
+# transcript_store.py
+import json
+from datetime import datetime, timedelta
+import bson
+import gridfs
+from bson import ObjectId
+
+
+class TranscriptStore:
+    """Compact per-recording transcript storage.
+
+    Instead of spreading transcription text across one `speakerSegments`
+    document per turn, the whole transcript of a recording is written once as
+    parallel arrays (columns) in `recordingTranscripts`. Transcripts that do not
+    fit comfortably in a single document are stored as JSON in GridFS and the
+    document only keeps a reference to the file.
+
+    Text is stored as one concatenated string per recording. Offsets into it are
+    counted in UTF-16 code units so the Next.js reader can slice it directly.
+    """
+    COLLECTION = "recordingTranscripts"
+    GRIDFS_BUCKET = "transcripts"
+    FORMAT_VERSION = 1
+    DEFAULT_GRIDFS_THRESHOLD_BYTES = 8 * 1024 * 1024
+
+    def __init__(self, db, gridfs_threshold_bytes: int = None):
+        self.db = db
+        self.gridfs_threshold_bytes = (
+            gridfs_threshold_bytes or self.DEFAULT_GRIDFS_THRESHOLD_BYTES
+        )
+        self.bucket = gridfs.GridFSBucket(db, bucket_name=self.GRIDFS_BUCKET)
+
+    @staticmethod
+    def _utf16_length(text: str) -> int:
+        return len(text.encode("utf-16-le")) // 2
+
+    @staticmethod
+    def _as_datetime(value) -> datetime:
+        if isinstance(value, datetime):
+            return value
+        return datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+
+    @classmethod
+    def build_columns(cls, recording_start: datetime, segments) -> dict:
+        """Convert segment dicts (speakerSegments shape) into parallel arrays"""
+        recording_start = cls._as_datetime(recording_start)
+        columns = {
+            "segmentIds": [],
+            "speakers": [],
+            "speakerIdx": [],
+            "identifiedSpeakerIds": [],
+            "confidenceScores": [],
+            "starts": [],
+            "ends": [],
+            "turnSubOffsets": [0],
+            "subStarts": [],
+            "subEnds": [],
+            "subConfidence": [],
+            "subTextOffsets": [0],
+            "text": ""
+        }
+        speaker_index = {}
+        text_parts = []
+        text_length = 0
+
+        ordered = sorted(segments, key=lambda s: cls._as_datetime(s['startTime']))
+        for segment in ordered:
+            label = segment.get('speakerLabel', '')
+            if label not in speaker_index:
+                speaker_index[label] = len(columns["speakers"])
+                columns["speakers"].append(label)
+
+            start = (cls._as_datetime(segment['startTime']) - recording_start).total_seconds()
+            end = (cls._as_datetime(segment['endTime']) - recording_start).total_seconds()
+            identified = segment.get('identifiedSpeakerId')
+
+            columns["segmentIds"].append(segment.get('_id'))
+            columns["speakerIdx"].append(speaker_index[label])
+            columns["identifiedSpeakerIds"].append(identified)
+            columns["confidenceScores"].append(float(segment.get('confidenceScore') or 0.0))
+            columns["starts"].append(round(start, 3))
+            columns["ends"].append(round(end, 3))
+
+            sub_segments = segment.get('transcriptionSegments') or []
+            if not sub_segments and segment.get('transcription'):
+                # Legacy segments without sub-segment timing: keep the text as one
+                # sub-segment spanning the whole turn
+                sub_segments = [{
+                    "startOffset": 0.0,
+                    "endOffset": segment.get('durationSeconds', end - start),
+                    "text": segment['transcription'],
+                    "confidence": 0.0
+                }]
+
+            for sub in sub_segments:
+                text = sub.get('text', '')
+                text_parts.append(text)
+                text_length += cls._utf16_length(text)
+                columns["subStarts"].append(round(float(sub.get('startOffset', 0.0)), 3))
+                columns["subEnds"].append(round(float(sub.get('endOffset', 0.0)), 3))
+                columns["subConfidence"].append(float(sub.get('confidence') or 0.0))
+                columns["subTextOffsets"].append(text_length)
+            columns["turnSubOffsets"].append(len(columns["subStarts"]))
+
+        # Drop the identified speaker column when nothing was identified
+        if not any(columns["identifiedSpeakerIds"]):
+            columns["identifiedSpeakerIds"] = []
+
+        columns["text"] = "".join(text_parts)
+        return columns
+
+    @classmethod
+    def expand_columns(cls, recording_id, recording_start: datetime, columns: dict):
+        """Convert parallel arrays back into segment dicts (speakerSegments shape)"""
+        recording_start = cls._as_datetime(recording_start)
+        text_units = columns["text"].encode("utf-16-le")
+        text_offsets = columns["subTextOffsets"]
+        turn_offsets = columns["turnSubOffsets"]
+        identified = columns.get("identifiedSpeakerIds") or []
+
+        segments = []
+        for idx, segment_id in enumerate(columns["segmentIds"]):
+            start = columns["starts"][idx]
+            end = columns["ends"][idx]
+            transcription_segments = []
+            for sub_idx in range(turn_offsets[idx], turn_offsets[idx + 1]):
+                text = text_units[
+                    text_offsets[sub_idx] * 2:text_offsets[sub_idx + 1] * 2
+                ].decode("utf-16-le")
+                transcription_segments.append({
+                    "startOffset": columns["subStarts"][sub_idx],
+                    "endOffset": columns["subEnds"][sub_idx],
+                    "text": text,
+                    "confidence": columns["subConfidence"][sub_idx]
+                })
+
+            segment = {
+                "_id": segment_id,
+                "recordingId": recording_id,
+                "speakerLabel": columns["speakers"][columns["speakerIdx"][idx]],
+                "startTime": recording_start + timedelta(seconds=start),
+                "endTime": recording_start + timedelta(seconds=end),
+                "durationSeconds": end - start,
+                "confidenceScore": columns["confidenceScores"][idx],
+                "transcription": " ".join(s["text"] for s in transcription_segments),
+                "transcriptionSegments": transcription_segments
+            }
+            if identified and identified[idx] is not None:
+                segment["identifiedSpeakerId"] = identified[idx]
+            segments.append(segment)
+        return segments
+
+    def _delete_gridfs_file(self, existing):
+        if existing and existing.get("gridFsId"):
+            try:
+                self.bucket.delete(existing["gridFsId"])
+            except gridfs.errors.NoFile:
+                pass
+
+    def write(self, recording, segments) -> dict:
+        """Write (or replace) the compact transcript of a recording"""
+        recording_id = recording['_id']
+        recording_start = self._as_datetime(recording['startTime'])
+        columns = self.build_columns(recording_start, segments)
+        existing = self.db[self.COLLECTION].find_one(
+            {"recordingId": recording_id},
+            {"gridFsId": 1}
+        )
+
+        now = datetime.utcnow()
+        document = {
+            "recordingId": recording_id,
+            "version": self.FORMAT_VERSION,
+            "recordingStart": recording_start,
+            "segmentCount": len(columns["segmentIds"]),
+            "storage": "inline",
+            "columns": columns,
+            "gridFsId": None,
+            "updatedAt": now
+        }
+
+        size_bytes = len(bson.encode(document))
+        if size_bytes > self.gridfs_threshold_bytes:
+            payload = dict(columns)
+            payload["segmentIds"] = [str(s) for s in columns["segmentIds"]]
+            payload["identifiedSpeakerIds"] = [
+                str(s) if s is not None else None
+                for s in columns["identifiedSpeakerIds"]
+            ]
+            data = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+            document["gridFsId"] = self.bucket.upload_from_stream(
+                f"{recording_id}.json",
+                data,
+                metadata={"recordingId": recording_id, "contentType": "application/json"}
+            )
+            document["storage"] = "gridfs"
+            document["columns"] = None
+            size_bytes = len(data)
+
+        document["sizeBytes"] = size_bytes
+        self.db[self.COLLECTION].update_one(
+            {"recordingId": recording_id},
+            {"$set": document, "$setOnInsert": {"createdAt": now}},
+            upsert=True
+        )
+        self._delete_gridfs_file(existing)
+        return document
+
+    def read(self, recording_id):
+        """Return the transcript as segment dicts, or None if no compact transcript exists"""
+        recording_id = ObjectId(recording_id)
+        document = self.db[self.COLLECTION].find_one({"recordingId": recording_id})
+        if not document:
+            return None
+
+        columns = document.get("columns")
+        if document.get("storage") == "gridfs":
+            columns = json.loads(
+                self.bucket.open_download_stream(document["gridFsId"]).read()
+            )
+            columns["segmentIds"] = [ObjectId(s) for s in columns["segmentIds"]]
+            columns["identifiedSpeakerIds"] = [
+                ObjectId(s) if s else None
+                for s in columns.get("identifiedSpeakerIds") or []
+            ]
+
+        return self.expand_columns(recording_id, document["recordingStart"], columns)
+
+    def delete(self, recording_id):
+        """Remove the compact transcript of a recording (and its GridFS file)"""
+        recording_id = ObjectId(recording_id)
+        existing = self.db[self.COLLECTION].find_one_and_delete({"recordingId": recording_id})
+        self._delete_gridfs_file(existing)
@@ -0,0 +1,169 @@
+# waveform.py
+import os
+from datetime import datetime
+import numpy as np
+import soundfile as sf
+
+
+class WaveformSummarizer:
+    """Multi-resolution waveform envelopes and speaker activity bitmaps.
+
+    Written from the waveform the worker already decoded (in memory, or the
+    decoded WAV in low-memory mode) so the UI can draw timelines and speaker
+    lanes from a few KB instead of the full audio.
+
+    Files (under STORAGE_PATH/waveforms/<recordingId>/):
+    - peaks_<samplesPerBin>.bin: int8 triples (min, max, rms) per bin, scaled to +/-127
+    - activity.bin: one packed bit row (MSB first) per speaker, one bit per frame
+    Layout metadata is stored on the recording document under `waveform`.
+    """
+    FORMAT_VERSION = 1
+    # 100, 10 and 1 bins per second at 16 kHz; each level must divide the next
+    DEFAULT_LEVELS = (160, 1600, 16000)
+    ACTIVITY_FRAME_SECONDS = 0.1
+    # Bins of the finest level processed at once, keeps temporaries small
+    CHUNK_BINS = 4096
+
+    def __init__(self, db, storage_path: str, levels=None):
+        self.db = db
+        self.storage_path = storage_path
+        self.levels = tuple(levels or self.DEFAULT_LEVELS)
+
+    @classmethod
+    def iter_chunks(cls, audio: np.ndarray, samples_per_bin: int):
+        chunk_samples = cls.CHUNK_BINS * samples_per_bin
+        for chunk_start in range(0, len(audio), chunk_samples):
+            yield audio[chunk_start:chunk_start + chunk_samples]
+
+    @staticmethod
+    def compute_envelope(blocks, samples_per_bin: int):
+        """Return float32 (min, max, rms) arrays with one value per bin
+
+        Args:
+            blocks: Iterable of audio blocks; every block but the last must hold
+                a multiple of samples_per_bin samples.
+        """
+        mins, maxs, rms = [], [], []
+        for block in blocks:
+            full_bins = len(block) // samples_per_bin
+            if full_bins:
+                frames = block[:full_bins * samples_per_bin].reshape(full_bins, samples_per_bin)
+                mins.append(frames.min(axis=1))
+                maxs.append(frames.max(axis=1))
+                rms.append(np.sqrt(np.mean(np.square(frames, dtype=np.float32), axis=1)))
+            tail = block[full_bins * samples_per_bin:]
+            if len(tail):
+                mins.append(tail.min(keepdims=True))
+                maxs.append(tail.max(keepdims=True))
+                rms.append(np.sqrt(np.mean(np.square(tail, dtype=np.float32), keepdims=True)))
+        if not mins:
+            empty = np.zeros(0, dtype=np.float32)
+            return empty, empty.copy(), empty.copy()
+        return tuple(np.concatenate(parts).astype(np.float32) for parts in (mins, maxs, rms))
+
+    @staticmethod
+    def downsample_envelope(envelope, factor: int):
+        """Merge `factor` consecutive bins of a finer envelope"""
+        mins, maxs, rms = envelope
+        if len(mins) == 0:
+            return envelope
+        bin_count = (len(mins) + factor - 1) // factor
+        pad = bin_count * factor - len(mins)
+        counts = np.full(bin_count, factor, dtype=np.float32)
+        counts[-1] -= pad
+        mins = np.pad(mins, (0, pad), mode='edge').reshape(bin_count, factor)
+        maxs = np.pad(maxs, (0, pad), mode='edge').reshape(bin_count, factor)
+        power = np.pad(np.square(rms), (0, pad)).reshape(bin_count, factor)
+        return mins.min(axis=1), maxs.max(axis=1), np.sqrt(power.sum(axis=1) / counts)
+
+    @staticmethod
+    def quantize_envelope(envelope) -> bytes:
+        stacked = np.stack(envelope, axis=1)
+        return np.clip(np.round(stacked * 127), -127, 127).astype(np.int8).tobytes()
+
+    @classmethod
+    def compute_activity(cls, turns, speakers, duration_seconds: float):
+        """Pack (speakerLabel, startSeconds, endSeconds) turns into one bit row per speaker"""
+        frame_count = int(np.ceil(duration_seconds / cls.ACTIVITY_FRAME_SECONDS))
+        active = np.zeros((len(speakers), frame_count), dtype=bool)
+        speaker_index = {label: idx for idx, label in enumerate(speakers)}
+        for label, start, end in turns:
+            first = max(0, int(start / cls.ACTIVITY_FRAME_SECONDS))
+            last = min(frame_count, int(np.ceil(end / cls.ACTIVITY_FRAME_SECONDS)))
+            if last > first:
+                active[speaker_index[label], first:last] = True
+        packed = np.packbits(active, axis=1)
+        return packed, frame_count
+
+    def write(self, recording, audio: np.ndarray, sr: int, segments) -> dict:
+        """Write envelopes and activity bitmaps from an in-memory waveform"""
+        finest = min(self.levels)
+        return self._write(recording, self.iter_chunks(audio, finest), len(audio), sr, segments)
+
+    def write_from_file(self, recording, audio_path: str, segments) -> dict:
+        """Same as write, reading a mono audio file block by block"""
+        info = sf.info(audio_path)
+        blocks = sf.blocks(audio_path, blocksize=self.CHUNK_BINS * min(self.levels), dtype='float32')
+        return self._write(recording, blocks, info.frames, info.samplerate, segments)
+
+    def _write(self, recording, blocks, num_samples: int, sr: int, segments) -> dict:
+        """Write envelopes and activity bitmaps and record their layout on the recording"""
+        output_dir = os.path.join(self.storage_path, 'waveforms', str(recording['_id']))
+        os.makedirs(output_dir, exist_ok=True)
+        duration_seconds = num_samples / sr
+
+        levels = []
+        envelope = None
+        previous_level = None
+        for samples_per_bin in sorted(self.levels):
+            if envelope is None:
+                envelope = self.compute_envelope(blocks, samples_per_bin)
+            else:
+                envelope = self.downsample_envelope(envelope, samples_per_bin // previous_level)
+            previous_level = samples_per_bin
+
+            path = os.path.join(output_dir, f"peaks_{samples_per_bin}.bin")
+            with open(path, 'wb') as f:
+                f.write(self.quantize_envelope(envelope))
+            levels.append({
+                "samplesPerBin": samples_per_bin,
+                "binsPerSecond": sr / samples_per_bin,
+                "binCount": len(envelope[0]),
+                "path": path
+            })
+
+        recording_start = recording['startTime']
+        turns = [
+            (
+                segment['speakerLabel'],
+                (segment['startTime'] - recording_start).total_seconds(),
+                (segment['endTime'] - recording_start).total_seconds()
+            )
+            for segment in segments
+        ]
+        speakers = sorted(set(label for label, _, _ in turns))
+        packed, frame_count = self.compute_activity(turns, speakers, duration_seconds)
+        activity_path = os.path.join(output_dir, 'activity.bin')
+        with open(activity_path, 'wb') as f:
+            f.write(packed.tobytes())
+
+        waveform = {
+            "version": self.FORMAT_VERSION,
+            "sampleRate": sr,
+            "numSamples": num_samples,
+            "durationSeconds": duration_seconds,
+            "levels": levels,
+            "activity": {
+                "frameSeconds": self.ACTIVITY_FRAME_SECONDS,
+                "frameCount": frame_count,
+                "bytesPerSpeaker": packed.shape[1],
+                "speakers": speakers,
+                "path": activity_path
+            },
+            "createdAt": datetime.utcnow()
+        }
+        self.db.recordings.update_one(
+            {"_id": recording['_id']},
+            {"$set": {"waveform": waveform, "durationSeconds": duration_seconds}}
+        )
+        return waveform
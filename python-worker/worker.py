@@ -1,9 +1,12 @@
 # worker.py
 import os
 import time
+import argparse
 from datetime import datetime
 from dotenv import load_dotenv
 from processor import AudioProcessor
+from admission import AdmissionController, ResourceModel, ResourceMonitor
+from stages import STAGES, StagePipeline
 from pymongo import MongoClient
 from bson import ObjectId
 
@@ -30,8 +33,25 @@ def check_mongodb_connection(mongodb_uri: str, max_retries: int = 5, retry_delay
                 raise ConnectionError(f"Failed to connect to MongoDB after {max_retries} attempts: {e}")
     return None
 
-def worker_loop():
-    """Main worker loop - polls MongoDB for jobs"""
+def parse_stages(value: str):
+    """Parse a --stages value: "full" (default) or a comma-separated list of STAGES"""
+    value = (value or "full").strip().lower()
+    if value == "full":
+        return None
+    stages = tuple(stage.strip() for stage in value.split(",") if stage.strip())
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if not stages or unknown:
+        raise argparse.ArgumentTypeError(
+            f"Invalid stages '{value}'. Use 'full' or a comma-separated list of: {', '.join(STAGES)}"
+        )
+    return stages
+
+def worker_loop(stages=None):
+    """Main worker loop - polls MongoDB for jobs
+    
+    Args:
+        stages: None to process whole jobs, or the stage tasks this worker claims.
+    """
     mongodb_uri = os.getenv("MONGODB_URI", "mongodb://mongo:27017/speaker_db")
     # Support both HUGGINGFACE_TOKEN and HF_TOKEN for compatibility
     hf_token = os.getenv("HUGGINGFACE_TOKEN") or os.getenv("HF_TOKEN")
@@ -50,33 +70,67 @@ def worker_loop():
     # Get language from environment variable (optional, defaults to None for auto-detect)
     whisper_language = os.getenv('WHISPER_LANGUAGE', None)
     
+    print(f"Worker stages: {', '.join(stages) if stages else 'full'}")
     print("Initializing audio processor...")
-    processor = AudioProcessor(mongodb_uri, hf_token, language=whisper_language)
+    processor = AudioProcessor(
+        mongodb_uri,
+        hf_token,
+        language=whisper_language,
+        load_diarization=stages is None or "diarize" in stages,
+        load_whisper=stages is None or "transcribe" in stages
+    )
+    pipeline = StagePipeline(processor) if stages else None
     print("Audio processor initialized. Starting worker loop...")
     
+    # Only claim jobs whose estimated cost fits the node's remaining budget
+    resource_model = ResourceModel(db, processor.whisper_model_name)
+    print(f"Worker baseline memory: {resource_model.measure_baseline():.0f} MB")
+    admission = AdmissionController(db, resource_model, processor.cpu_threads)
+    # Idle processes hold their models too, so every process counts against the node budget
+    admission.register_process(resource_model.baseline_mb)
+    
     while True:
         try:
-            # Find pending job
-            job = db.processingJobs.find_one_and_update(
-                {"status": "queued"},
-                {"$set": {"status": "running", "startedAt": datetime.utcnow()}},
-                sort=[("createdAt", 1)]  # FIFO
-            )
+            # Diarize workers split queued jobs into stage tasks, then all stage
+            # workers claim tasks
+            expanded = None
+            if pipeline and "diarize" in stages:
+                expanded = pipeline.expand_next_job(admission)
+            
+            # Find pending job that fits the resource budget
+            job = admission.claim_next_job(stages)
             
             if job:
-                print(f"Processing job: {job['_id']}")
+                estimate = job.get('resourceEstimate') or {}
+                print(
+                    f"Processing job: {job['_id']} "
+                    f"(duration={estimate.get('durationSeconds', 0):.0f}s, "
+                    f"estimated memory={estimate.get('memoryMb')} MB, "
+                    f"mode={job.get('executionMode', 'standard')})"
+                )
                 try:
-                    processor.process_recording(str(job['_id']))
-                    print(f"Job {job['_id']} completed successfully")
+                    with ResourceMonitor(db, job['_id']) as monitor:
+                        if pipeline:
+                            processed = pipeline.run_task(job)
+                        else:
+                            processed = processor.process_recording(str(job['_id']))
+                    print(
+                        f"Job {job['_id']} completed successfully "
+                        f"(memory increase={monitor.memory_increase_mb:.0f} MB, wall={monitor.wall_seconds:.0f}s)"
+                    )
+                    # Jobs skipped because their job or recording is gone say nothing about cost
+                    if processed:
+                        resource_model.record(job, monitor)
                 except Exception as e:
                     print(f"Error processing job {job['_id']}: {str(e)}")
                     import traceback
                     traceback.print_exc()
-            else:
+            elif not expanded:
                 # No jobs, wait a bit
                 time.sleep(5)
         except KeyboardInterrupt:
             print("Worker interrupted. Shutting down...")
+            admission.unregister_process()
             break
         except Exception as e:
             print(f"Error in worker loop: {str(e)}")
@@ -85,5 +139,13 @@ def worker_loop():
             time.sleep(5)
 
 if __name__ == "__main__":
-    worker_loop()
+    parser = argparse.ArgumentParser(description="Speaker diarization worker")
+    parser.add_argument(
+        "--stages",
+        type=parse_stages,
+        default=parse_stages(os.getenv("WORKER_STAGES", "full")),
+        help=f"'full' (default) or comma-separated stages to claim: {', '.join(STAGES)}"
+    )
+    args = parser.parse_args()
+    worker_loop(args.stages)
 